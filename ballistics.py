@@ -0,0 +1,104 @@
+from math import sqrt, cos, sin, inf
+from physics import *
+
+def stopTime(speed, friction):
+    if friction <= 0:
+        return inf
+
+    return speed / friction
+
+def distanceAt(speed, friction, t):
+    ### Path length after t seconds of free rolling with linearly decreasing speed
+    t = min(t, stopTime(speed, friction))
+
+    return speed * t - friction * t * t / 2
+
+def timeToDistance(speed, friction, distance):
+    ### Inverse of distanceAt, inf if the ball stops earlier
+    if distance <= 0:
+        return 0
+
+    if friction <= 0:
+        return distance / speed if speed > 0 else inf
+
+    d = speed * speed - 2 * friction * distance
+    if d < 0:
+        return inf
+
+    return (speed - sqrt(d)) / friction
+
+class FreeBall:
+    ### Closed form of ball motion between contacts, see Ball.update
+    def __init__(self, ball, time=0):
+        self.time = time
+        self.x, self.y = ball.pos.x, ball.pos.y
+        self.speed = ball.vel.size
+        self.dir = ball.vel.dir
+        self.cos = cos(self.dir)
+        self.sin = sin(self.dir)
+        self.friction = ball.friction
+        self.r = ball.r
+
+    def at(self, time):
+        d = distanceAt(self.speed, self.friction, time - self.time)
+
+        return Point(self.x + self.cos * d, self.y + self.sin * d)
+
+    def speedAt(self, time):
+        return max(self.speed - self.friction * (time - self.time), 0)
+
+    def apply(self, ball, time):
+        ball.pos = self.at(time)
+        ball.vel = Vec(self.speedAt(time), self.dir)
+
+    def wallTime(self, size):
+        ### Absolute time of the first touch with field walls, inf if the ball stops earlier
+        distance = inf
+        for coord, direction, half in [(self.x, self.cos, size.width / 2), (self.y, self.sin, size.height / 2)]:
+            if abs(direction) > 1e-12:
+                limit = half - self.r if direction > 0 else self.r - half
+                distance = min(distance, max((limit - coord) / direction, 0))
+
+        return self.time + timeToDistance(self.speed, self.friction, distance)
+
+    def boxTime(self, box):
+        ### Absolute time of the first touch with AABB, conservative near its corners; inf if the ball misses or stops earlier
+        enter, leave = 0, inf
+        for coord, direction, low, high in [(self.x, self.cos, box.min.x - self.r, box.max.x + self.r),
+                                            (self.y, self.sin, box.min.y - self.r, box.max.y + self.r)]:
+            if abs(direction) <= 1e-12:
+                if not low <= coord <= high:
+                    return inf
+                continue
+
+            near, far = (low - coord) / direction, (high - coord) / direction
+            enter = max(enter, min(near, far))
+            leave = min(leave, max(near, far))
+
+        if enter > leave:
+            return inf
+
+        return self.time + timeToDistance(self.speed, self.friction, enter)
+
+def propagate(ball, duration, size):
+    ### Moves free ball (no robots around) for duration seconds in O(walls touches), returns touches count
+    time = 0
+    touches = 0
+    while True:
+        free = FreeBall(ball, time)
+        contact = free.wallTime(size)
+        if contact >= duration or free.speedAt(contact) <= 0:
+            free.apply(ball, duration)
+            return touches
+
+        ### Mirror velocity from touched wall as PhysEngine.step does
+        free.apply(ball, contact)
+        x, y = ball.vel.size * free.cos, ball.vel.size * free.sin
+        if abs(ball.pos.x) + ball.r >= size.width / 2 - 1e-9 and ball.pos.x * x > 0:
+            x = -x
+        if abs(ball.pos.y) + ball.r >= size.height / 2 - 1e-9 and ball.pos.y * y > 0:
+            y = -y
+
+        ball.vel = point2vec(Point(x, y)) * ball.bounceFactor
+        time = contact
+        touches += 1
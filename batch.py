@@ -0,0 +1,49 @@
+import numpy as np
+from world import World
+
+class BatchEngine(World):
+    stateNames = ['robotPos', 'robotAngle', 'robotVel', 'wheelVel', 'wheelTarget', 'ballPos', 'ballVel']
+
+    def __init__(self, envsCount, robotsCount=1, robot=None, ball=None, dtype=np.float32):
+        ### State of one environment, used for resets
+        self.initial = World(robotsCount, robot, ball, dtype)
+
+        self.envsCount = envsCount
+        self.robotsCount = robotsCount
+        self.wheelsCount = self.initial.wheelsCount
+        self.__dict__.update({name: value for name, value in vars(self.initial).items() if name not in self.stateNames})
+
+        ### Same arrays as in World with leading environment dimension
+        for name in self.stateNames:
+            single = getattr(self.initial, name)
+            setattr(self, name, np.repeat(single[None], envsCount, axis=0))
+
+    @classmethod
+    def fromEngine(cls, engine, envsCount, dtype=np.float32):
+        batch = cls(envsCount, len(engine.robots), engine.robots[0], engine.ball, dtype)
+        batch.initial.load(engine)
+        batch.reset()
+
+        return batch
+
+    def reset(self, envs=None):
+        ### envs is a boolean mask or indices of environments, all environments by default
+        if envs is None:
+            envs = slice(None)
+
+        for name in self.stateNames:
+            getattr(self, name)[envs] = getattr(self.initial, name)
+
+    def load(self, engine, env=0):
+        world = World.fromEngine(engine)
+
+        for name in self.stateNames:
+            getattr(self, name)[env] = getattr(world, name)
+
+    def store(self, engine, env=0):
+        world = World(len(engine.robots), engine.robots[0], engine.ball)
+
+        for name in self.stateNames:
+            setattr(world, name, getattr(self, name)[env].astype(np.float64))
+
+        world.store(engine)
@@ -0,0 +1,47 @@
+import os
+import sys
+from timeit import repeat
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import physics
+from engine import PhysEngine
+
+### Counts Point and Vec objects created by PhysEngine.step
+
+created = 0
+
+def counting(init):
+    def wrapper(self, *args, **kwargs):
+        global created
+        created += 1
+        init(self, *args, **kwargs)
+
+    return wrapper
+
+def measure(robotsCount, steps=2000, dt=0.001):
+    global created
+
+    engine = PhysEngine(robotsCount=robotsCount)
+    for i, robot in enumerate(engine.robots):
+        robot.pos = physics.Point(-0.8 + 0.4 * i, 0.3)
+        robot.setMotors([1, 2, 3, 1])
+
+    originals = physics.Point.__init__, physics.Vec.__init__
+    physics.Point.__init__, physics.Vec.__init__ = map(counting, originals)
+    try:
+        created = 0
+        for i in range(steps):
+            engine.step(dt)
+        objects = created / steps
+    finally:
+        physics.Point.__init__, physics.Vec.__init__ = originals
+
+    time = min(repeat(lambda: engine.step(dt), number=steps, repeat=5)) / steps
+
+    return objects, time
+
+if __name__ == '__main__':
+    for robotsCount in [1, 4, 16]:
+        objects, time = measure(robotsCount)
+        print("%2d robots: %6.1f Point/Vec objects per step, %7.1f us per step" % (robotsCount, objects, time * 1e6))
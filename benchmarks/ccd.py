@@ -0,0 +1,61 @@
+import os
+import sys
+from math import atan2, cos, sin
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from physics import Point, Vec, Circle
+from engine import PhysEngine
+from field import Field
+from robot import MAX_VEL
+
+### Regression check of continuous collisions: ball is fired at a standing robot and at a circle obstacle at MAX_VEL
+### and at kick speed, hits from head-on to grazing ones must be found with large dt and bounce the same way as with
+### a tiny one. Exits with code 1 if some contact is missed or bounces wrong
+
+SPEEDS = [MAX_VEL, 10]
+STEPS = [0.005, 0.01]
+REFERENCE_STEP = 0.00001
+MAX_ANGLE_ERROR = 0.05
+OBSTACLE = Circle(0.1, pos=Point(0, 0))
+
+def shoot(speed, offset, dt, continuous, obstacle=False):
+    ### Ball starts 0.4 m left of robot or obstacle at (0, 0), offset is distance of its path from their center
+    Field.obstacles = [OBSTACLE] if obstacle else []
+    engine = PhysEngine(continuous=continuous)
+    robot = engine.robots[0]
+    robot.pos = Point(0, 0.7) if obstacle else Point(0, 0)
+    ball = engine.ball
+    ball.pos = Point(-0.4, offset)
+    ball.vel = Vec(speed, 0)
+    ball.friction = 0
+
+    for i in range(round(0.6 / speed / dt)):
+        engine.step(dt)
+
+    return ball.vel.dir
+
+def angleError(a, b):
+    return abs(atan2(sin(a - b), cos(a - b)))
+
+if __name__ == '__main__':
+    engine = PhysEngine()
+
+    failed = 0
+    for obstacle, r in ((False, engine.robots[0].r), (True, OBSTACLE.r)):
+        offsets = [(r + engine.ball.r) * k for k in (0, 0.5, 0.9, 0.97, 0.99)]
+        for speed in SPEEDS:
+            for offset in offsets:
+                reference = shoot(speed, offset, REFERENCE_STEP, False, obstacle)
+                for dt in STEPS:
+                    discrete = angleError(shoot(speed, offset, dt, False, obstacle), reference)
+                    continuous = angleError(shoot(speed, offset, dt, True, obstacle), reference)
+                    ok = continuous < MAX_ANGLE_ERROR
+                    failed += not ok
+
+                    print("%s, speed %4.1f m/s, offset %.3f m, dt %5.3f s: discrete error %.3f rad, continuous error %.3f rad%s" % (
+                        'obstacle' if obstacle else 'robot', speed, offset, dt, discrete, continuous, '' if ok else '  FAILED'))
+
+    if failed:
+        print("%d shots bounced wrong with continuous collisions" % failed)
+        sys.exit(1)
@@ -0,0 +1,69 @@
+import os
+import sys
+import random
+from timeit import repeat
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from physics import PI, Point, Vec, Circle, Size
+from engine import PhysEngine
+from field import Field
+
+### Cost of PhysEngine.contacts against robots count, broad phase keeps it close to linear.
+### Also checks that a robot pushed into the ball by another one hits it at the same tick with event driven ball
+
+def timeCall(function, number=2000):
+    return min(repeat(function, number=number, repeat=5)) / number
+
+def measure(robotsCount, seed=0):
+    rng = random.Random(seed)
+    engine = PhysEngine(robotsCount=robotsCount)
+    halfWidth, halfHeight = Field.size.width / 2, Field.size.height / 2
+    for robot in engine.robots:
+        robot.pos = Point(rng.uniform(-halfWidth, halfWidth), rng.uniform(-halfHeight, halfHeight))
+
+    bodies = engine.robots + [engine.ball] + Field.obstacles
+    candidates = len(engine.broadPhase.pairs(bodies))
+    allPairs = len(bodies) * (len(bodies) - 1) // 2
+
+    return candidates, allPairs, timeCall(lambda: engine.contacts(False))
+
+def pushShot(vel, eventDrivenBall):
+    ### Robot at (-0.4, 0) drives into the standing one at (0, 0), which is pushed into the ball
+    engine = PhysEngine(robotsCount=2, eventDrivenBall=eventDrivenBall)
+    pusher, pushed = engine.robots
+    pusher.pos = Point(-0.4, 0)
+    pushed.pos = Point(0, 0)
+    pusher.move(vel, -PI / 2, 0)
+    engine.ball.pos = Point(0.25, 0)
+    engine.ball.vel = Vec(0, 0)
+
+    first = None
+    for i in range(600):
+        engine.step(0.001)
+        if first is None and engine.ball.vel.size > 0:
+            first = engine.tick
+    engine.syncBall()
+
+    return first, engine.ball.vel.size
+
+def checkPush():
+    for vel in [0.5, 1, 2]:
+        stepped, event = pushShot(vel, False), pushShot(vel, True)
+        if stepped[0] != event[0] or abs(stepped[1] - event[1]) > 1e-3:
+            print("pushed robot at %.1f m/s: first ball contact at tick %s, speed %.3f m/s with event driven ball, "
+                  "tick %s, speed %.3f m/s with steps" % (vel, event[0], event[1], stepped[0], stepped[1]))
+            sys.exit(1)
+
+if __name__ == '__main__':
+    checkPush()
+
+    ### Goal posts
+    for x in (-Field.size.width / 2, Field.size.width / 2):
+        for y in (-0.3, 0.3):
+            Field.obstacles.append(Circle(0.02, pos=Point(x, y)))
+
+    for robotsCount in [2, 4, 8, 16, 32, 64]:
+        candidates, allPairs, time = measure(robotsCount)
+        print("%2d robots: %4d candidate pairs of %4d, contacts %7.1f us, %.2f us per robot" % (
+            robotsCount, candidates, allPairs, time * 1e6, time * 1e6 / robotsCount))
@@ -0,0 +1,56 @@
+import os
+import shutil
+import sys
+import tempfile
+from time import perf_counter
+from timeit import repeat
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from physics import Point, Circle
+import field
+from field import Field
+
+### Building and loading of the field grid, Field.touch at different places of the field.
+### Exits with code 1 if a truncated grid file is not built again
+
+def timeCall(function, number=100000):
+    return min(repeat(function, number=number, repeat=5)) / number
+
+if __name__ == '__main__':
+    ### Own cache directory, so the first load always builds
+    field.CACHE_DIR = tempfile.mkdtemp()
+
+    ts = perf_counter()
+    Field.loadGrid()
+    built = perf_counter() - ts
+
+    Field.grid = None
+    ts = perf_counter()
+    grid = Field.loadGrid()
+    loaded = perf_counter() - ts
+
+    ### Files cut inside of the header or of the arrays are built again
+    path = os.path.join(field.CACHE_DIR, 'field-%s.grid' % Field.key)
+    with open(path, 'rb') as file:
+        data = file.read()
+    for size in (0, 10, field.GRID_HEADER.size + 100):
+        with open(path, 'wb') as file:
+            file.write(data[:size])
+        Field.grid = None
+        try:
+            Field.loadGrid()
+        except Exception as error:
+            print("grid cut to %d bytes is not rebuilt: %r" % (size, error))
+            sys.exit(1)
+    shutil.rmtree(field.CACHE_DIR)
+    print("grid %dx%d: built and saved in %.0f ms, loaded in %.1f ms" % (grid.columns, grid.rows, built * 1e3, loaded * 1e3))
+
+    robot = Circle(0.11)
+    places = [('center', Point(0, 0)), ('near wall', Point(0, Field.halfHeight - 0.13)), ('at wall', Point(0, Field.halfHeight - 0.1)),
+              ('near goal', Point(-Field.lineX + 0.05, 0.5)), ('at goal post', Point(-Field.lineX - 0.04, 0.2))]
+    for name, pos in places:
+        robot.pos = pos
+        print("touch %-12s %5.2f us %s" % (name, timeCall(lambda: Field.touch(robot)) * 1e6, Field.touch(robot)[0]))
+
+    print("onLine %.2f us" % (timeCall(lambda: Field.onLine(Point(Field.lineX, 0))) * 1e6))
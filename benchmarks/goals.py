@@ -0,0 +1,86 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from physics import Point, Vec
+from field import Field
+from env import VectorEnv
+import tournament
+
+### Regression check of goal detection: the ball is shot straight into the goals at several speeds and every shot
+### must be counted, though the ball stays behind the goal line only for a few steps. Exits with code 1 if one is missed
+
+SPEEDS = [0.5, 1, 2, 3, 4]
+
+def envShots(speeds):
+    ### One environment per shot from the center, robots stand aside; returns goal of every environment
+    shots = np.array([(speed, side) for speed in speeds for side in (1, -1)])
+
+    def spawn(env, envs):
+        env.batch.robotPos[envs] = (0, Field.lineY - 0.2)
+        env.batch.ballPos[envs] = 0
+        env.batch.ballVel[envs] = 0
+        env.batch.ballVel[envs, 0] = shots[envs, 0] * shots[envs, 1]
+
+    env = VectorEnv(len(shots), spawn=spawn, maxTime=10)
+    env.reset()
+
+    goals = np.zeros(len(shots))
+    finished = np.zeros(len(shots), dtype=bool)
+    action = np.zeros(env.actionShape)
+    while not finished.all():
+        observation, reward, done = env.step(action)
+        goals[done & ~finished] = env.goals[done & ~finished]
+        finished |= done
+
+    return shots, goals
+
+def stand(state):
+    ### Controller of matchShots, robots do not move
+    return [(0, 0, 0)] * len(state.robots)
+
+def matchShots(speeds, continuous=False):
+    ### Tournament matches where every kickoff shoots the ball to positive x goal, robots stand aside;
+    ### returns goals of home team, which attacks positive x, and of away team for every speed
+    kickoff = tournament.kickoff
+
+    def shot(engine, attacks, rnd):
+        kickoff(engine, attacks, rnd)
+        for i, robot in enumerate(engine.robots):
+            robot.pos = Point(-0.5 + 0.3 * i, Field.lineY - 0.1)
+        engine.ball.vel = Vec(speed, 0)
+
+    settings = {'time': 4, 'dt': 0.001, 'robots': 1, 'controlPeriod': 0.016, 'continuous': continuous, 'timeout': None}
+    spec = 'benchmarks.goals:stand'
+    results = []
+    tournament.kickoff = shot
+    try:
+        for speed in speeds:
+            result = tournament.playMatch((0, spec, spec, 0, 0, settings))
+            row = dict(zip(tournament.RESULT_FIELDS, result))
+            results.append((row['homeGoals'], row['awayGoals']))
+    finally:
+        tournament.kickoff = kickoff
+
+    return results
+
+if __name__ == '__main__':
+    failed = 0
+
+    shots, goals = envShots(SPEEDS)
+    for (speed, side), goal in zip(shots, goals):
+        ok = goal == side
+        failed += not ok
+        print("VectorEnv, speed %.1f m/s to %+d goal: %+d%s" % (speed, side, goal, '' if ok else '  MISSED'))
+
+    for continuous in (False, True):
+        for speed, (home, away) in zip(SPEEDS, matchShots(SPEEDS, continuous)):
+            ok = home > 0 and away == 0
+            failed += not ok
+            print("tournament%s, speed %.1f m/s: %d:%d%s" % (' continuous' if continuous else '', speed, home, away, '' if ok else '  MISSED'))
+
+    if failed:
+        print("%d shots were not counted" % failed)
+        sys.exit(1)
@@ -0,0 +1,100 @@
+import os
+import sys
+from math import sin, cos
+from random import Random
+from timeit import repeat
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import robot as robotModule
+from physics import *
+from robot import Robot
+
+### Robot methods as they were before Kinematics, trig for every wheel on every call
+
+def legacyMove(self, vel, dir, heading):
+    if abs(vel) > 2:
+        vel = 2 * sign(vel)
+
+    dir += PI
+
+    _dir = abs(dir);
+    while (_dir > PI / 2):
+        _dir -= PI / 2
+    _dir = min(_dir, PI / 2 - _dir)
+
+    vel *= 1.0 / cos(_dir)
+
+    err = heading - self.angle
+    err = adduction(err)
+    u = err * 5
+
+    if abs(u) > 0.3:
+        u = sign(u) * 0.3
+
+    v = [(vel * sin(wheel.angle + dir - self.angle)) for wheel in self.wheels]
+    k = abs(vel) / max([abs(x) for x in v])
+    v = [(vm * k + u) for vm in v]
+
+    self.setMotors(v)
+    return v
+
+def legacyCalcVel(self):
+    wholeVel = Point(0, 0)
+    for wheel in self.wheels:
+        wholeVel += Point(cos(wheel.angle), sin(wheel.angle)) * wheel.vel
+
+    velNF = point2vec(wholeVel)
+
+    deltaVel = Point()
+    for i, wheel in enumerate(self.wheels):
+        dV = cos(velNF.dir - wheel.angle) * velNF.size - wheel.vel
+        deltaVel += Point(cos(wheel.angle), sin(wheel.angle)) * dV
+
+    deltaVelVec = point2vec(deltaVel)
+    if deltaVelVec.size > robotModule.FRICTION * 4:
+        deltaVelVec.size = robotModule.FRICTION * 4
+
+    return point2vec(wholeVel - vec2point(deltaVelVec))
+
+def randomRobots(count, seed=0):
+    rnd = Random(seed)
+    robots = []
+    for i in range(count):
+        robot = Robot()
+        robot.angle = rnd.uniform(-PI, PI)
+        for wheel in robot.wheels:
+            wheel.vel = rnd.uniform(-3, 3)
+        robots.append(robot)
+
+    return robots
+
+def checkError(robots):
+    velError = moveError = 0
+    for robot in robots:
+        new, old = robot.calcVel(), legacyCalcVel(robot)
+        velError = max(velError, abs(new.x - old.x), abs(new.y - old.y))
+
+        robot.move(1.5, 0.7, 0.2)
+        new = [wheel.target for wheel in robot.wheels]
+        old = legacyMove(robot, 1.5, 0.7, 0.2)
+        moveError = max(moveError, max(abs(n - o) for n, o in zip(new, old)))
+
+    return velError, moveError
+
+def timeCall(function, number=20000):
+    return min(repeat(function, number=number, repeat=5)) / number * 1e6
+
+if __name__ == '__main__':
+    robots = randomRobots(1000)
+    velError, moveError = checkError(robots)
+    print("max difference: calcVel %.2e, move %.2e" % (velError, moveError))
+
+    robot = robots[0]
+    print("calcVel: %5.2f us, legacy %5.2f us" % (timeCall(robot.calcVel), timeCall(lambda: legacyCalcVel(robot))))
+    print("move:    %5.2f us, legacy %5.2f us" % (timeCall(lambda: robot.move(1.5, 0.7, 0.2)), timeCall(lambda: legacyMove(robot, 1.5, 0.7, 0.2))))
+
+    ### Any wheels layout works, e.g. 3 wheels robot
+    robot = Robot((60 * DEG2RAD, 180 * DEG2RAD, 300 * DEG2RAD))
+    robot.move(1, 0.5, 0)
+    print("3 wheels move targets:", ", ".join("%.3f" % wheel.target for wheel in robot.wheels))
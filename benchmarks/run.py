@@ -0,0 +1,192 @@
+import os
+import sys
+import json
+import argparse
+import platform
+import subprocess
+from time import perf_counter
+from timeit import repeat
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import physics
+from physics import Point, Vec
+from engine import PhysEngine
+from field import Field
+
+### Bump when benchmarks change meaning, baselines of other versions are not compared
+SUITE_VERSION = 1
+BASELINES = os.path.join(ROOT, 'benchmarks', 'baselines')
+
+### Every benchmark returns seconds per operation, lower is better
+BENCHMARKS = {}
+
+def benchmark(name):
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+
+    return register
+
+def timeCall(function, number):
+    return min(repeat(function, number=number, repeat=5)) / number
+
+def makeEngine(robotsCount):
+    engine = PhysEngine(robotsCount=robotsCount)
+    for i, robot in enumerate(engine.robots):
+        robot.pos = Point(-0.8 + 1.6 * i / max(robotsCount - 1, 1), 0.3)
+        robot.setMotors([1, 2, 3, 1])
+
+    return engine
+
+def engineUpdate(robotsCount, duration=0.5):
+    ### Seconds per physics step done by PhysEngine.update
+    engine = makeEngine(robotsCount)
+    best = None
+    for i in range(5):
+        tick, start = engine.tick, perf_counter()
+        while perf_counter() - start < duration / 5:
+            engine.update()
+        perStep = (perf_counter() - start) / max(engine.tick - tick, 1)
+        best = perStep if best is None else min(best, perStep)
+
+    return best
+
+for robotsCount in [1, 4, 16]:
+    benchmark('engine.update.%d' % robotsCount)(lambda robotsCount=robotsCount: engineUpdate(robotsCount))
+
+@benchmark('robot.calcVel')
+def calcVel():
+    robot = makeEngine(1).robots[0]
+    return timeCall(robot.calcVel, 20000)
+
+@benchmark('robot.calcOmega')
+def calcOmega():
+    robot = makeEngine(1).robots[0]
+    return timeCall(robot.calcOmega, 20000)
+
+@benchmark('robot.move')
+def move():
+    robot = makeEngine(1).robots[0]
+    return timeCall(lambda: robot.move(1, 0.5, 0.2), 20000)
+
+@benchmark('field.touch')
+def fieldTouch():
+    inside, wall = makeEngine(2).robots
+    inside.pos = Point(0, 0)
+    wall.pos = Point(1.15, 0.85)
+    return timeCall(lambda: (Field.touch(inside), Field.touch(wall)), 20000) / 2
+
+@benchmark('physics.angleCheck')
+def angleCheck():
+    return timeCall(lambda: (physics.angleCheck(7.5), physics.angleCheck(-1)), 100000) / 2
+
+@benchmark('physics.adduction')
+def adduction():
+    return timeCall(lambda: (physics.adduction(4), physics.adduction(-4)), 100000) / 2
+
+@benchmark('physics.getProj')
+def getProj():
+    vec = Vec(1.5, 0.3)
+    return timeCall(lambda: physics.getProj(vec, 2), 100000)
+
+@benchmark('graph.draw')
+def graphDraw():
+    ### Offscreen frame of the main window canvas size
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5 import QtGui, QtWidgets
+    from PyQt5.QtCore import QSize
+    from design import GraphEngine
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+    size = QSize(620, 470)
+    image = QtGui.QImage(size, QtGui.QImage.Format_ARGB32_Premultiplied)
+    engine = makeEngine(4)
+    engine.storePrevious()
+    graph = GraphEngine(QtGui.QPainter(), engine, image)
+    graph.resizeEvent(QtGui.QResizeEvent(size, size))
+
+    return timeCall(graph.draw, 200)
+
+def gitCommit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+def run(names):
+    results = {}
+    for name in names:
+        results[name] = BENCHMARKS[name]()
+        print("%-22s %10.3f us" % (name, results[name] * 1e6), file=sys.stderr)
+
+    return results
+
+def save(results, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump({
+            'version': SUITE_VERSION,
+            'commit': gitCommit(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'results': results
+        }, file, indent=4)
+
+def compare(results, path, threshold):
+    with open(path) as file:
+        baseline = json.load(file)
+
+    if baseline.get('version') != SUITE_VERSION:
+        print("Baseline %s has suite version %s, current is %d, skipping comparison" % (path, baseline.get('version'), SUITE_VERSION), file=sys.stderr)
+        return []
+
+    regressions = []
+    for name, time in results.items():
+        if name not in baseline['results']:
+            continue
+
+        ratio = time / baseline['results'][name]
+        mark = ''
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            mark = '  SLOWER'
+        print("%-22s %10.3f us  baseline %10.3f us  %+6.1f%%%s" % (name, time * 1e6, baseline['results'][name] * 1e6, (ratio - 1) * 100, mark))
+
+    return regressions
+
+def baselinePath(name):
+    return name if name.endswith('.json') else os.path.join(BASELINES, name + '.json')
+
+def main():
+    parser = argparse.ArgumentParser(description="Soccer simulator benchmarks")
+    parser.add_argument('names', nargs='*', help="benchmarks to run, prefixes are allowed, all by default")
+    parser.add_argument('--save', metavar='BASELINE', help="save results as baseline, name or path to json")
+    parser.add_argument('--compare', metavar='BASELINE', help="compare results with baseline")
+    parser.add_argument('--threshold', type=float, default=0.1, help="allowed slowdown before reporting regression, 0.1 is 10%%")
+    parser.add_argument('--list', action='store_true', help="list benchmarks")
+    args = parser.parse_args()
+
+    if args.list:
+        print('\n'.join(BENCHMARKS))
+        return
+
+    names = [name for name in BENCHMARKS if not args.names or any(name.startswith(prefix) for prefix in args.names)]
+    if not names:
+        parser.error("no benchmarks match %s" % ' '.join(args.names))
+
+    results = run(names)
+
+    if args.save:
+        save(results, baselinePath(args.save))
+
+    if args.compare:
+        regressions = compare(results, baselinePath(args.compare), args.threshold)
+        if regressions:
+            print("Slower than baseline by more than %d%%: %s" % (args.threshold * 100, ', '.join(regressions)), file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
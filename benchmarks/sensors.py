@@ -0,0 +1,26 @@
+import os
+import sys
+from timeit import repeat
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import PhysEngine
+from batch import BatchEngine
+from sensors import Sensors, IRRing, LineSensors
+
+def timeCall(function, number=1000):
+    return min(repeat(function, number=number, repeat=5)) / number
+
+if __name__ == '__main__':
+    for irCount in [16, 32]:
+        sensors = Sensors(irRing=IRRing(irCount), seed=0)
+
+        for robotsCount in [1, 4]:
+            engine = PhysEngine(robotsCount=robotsCount)
+            time = timeCall(lambda: sensors.readEngine(engine))
+            print("%2d IR sensors, engine with %d robots: %.1f us per control" % (irCount, robotsCount, time * 1e6))
+
+        for envsCount in [64, 1024]:
+            batch = BatchEngine(envsCount, 4)
+            time = timeCall(lambda: sensors.readWorld(batch), number=20)
+            print("%2d IR sensors, batch of %4d x 4 robots: %.2f ms, %.2f us per robot" % (irCount, envsCount, time * 1e3, time / envsCount / 4 * 1e6))
@@ -0,0 +1,43 @@
+import os
+import sys
+from timeit import repeat
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from physics import Vec
+from engine import PhysEngine
+from lookahead import rollout
+
+def timeCall(function, number=10000):
+    return min(repeat(function, number=number, repeat=5)) / number
+
+def checkRollout():
+    ### Rollouts start from the same state as fork, also with the ball asleep in event driven engine
+    engine = PhysEngine(eventDrivenBall=True)
+    engine.ball.vel = Vec(1, 0)
+    for i in range(100):
+        engine.step(0.001)
+
+    batch = rollout(engine, [(0, 0, 0)], horizon=0)
+    fork = engine.fork()
+    error = np.abs(batch.ballPos[0] - tuple(fork.ball.pos)).max()
+    if error > 1e-9:
+        print("rollout starts %.4f m away from the ball of fork" % error)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    checkRollout()
+
+    for robotsCount in [1, 4]:
+        engine = PhysEngine(robotsCount=robotsCount)
+        state = engine.snapshot()
+
+        print("%d robots: snapshot %.1f us, restore %.1f us, fork %.1f us" % (robotsCount,
+            timeCall(engine.snapshot) * 1e6, timeCall(lambda: engine.restore(state)) * 1e6, timeCall(engine.fork) * 1e6))
+
+    engine = PhysEngine(robotsCount=4)
+    for count in [16, 64, 256]:
+        commands = [(1, dir, 0) for dir in np.linspace(-np.pi, np.pi, count)]
+        time = timeCall(lambda: rollout(engine, commands, horizon=0.5), number=1)
+        print("%3d rollouts of 0.5 s: %.1f ms, %.1f us per rollout" % (count, time * 1e3, time / count * 1e6))
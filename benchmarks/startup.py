@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+### Commands timed from process start to exit, interpreter start included
+COMMANDS = {
+    'python': [sys.executable, '-c', 'pass'],
+    'import engine': [sys.executable, '-c', 'import engine'],
+    'import headless': [sys.executable, '-c', 'import headless'],
+    'import design': [sys.executable, '-c', 'import design'],
+    'window': [sys.executable, 'main.py', '--startup-time'],
+}
+
+def timeCommand(command, repeat=5):
+    ### The fastest of runs, the others are slowed down by the rest of the system
+    best = None
+    for i in range(repeat):
+        ts = perf_counter()
+        result = subprocess.run(command, cwd=ROOT, env=dict(os.environ, QT_QPA_PLATFORM='offscreen'), capture_output=True, text=True, check=True)
+        elapsed = perf_counter() - ts
+        if best is None or elapsed < best[0]:
+            best = (elapsed, (result.stdout.strip().splitlines() or [""])[-1])
+
+    return best
+
+if __name__ == '__main__':
+    for name, command in COMMANDS.items():
+        elapsed, output = timeCommand(command)
+        print("%-16s %6.1f ms  %s" % (name, elapsed * 1e3, output))
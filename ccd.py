@@ -0,0 +1,40 @@
+from math import sqrt
+
+### Continuous collision detection: times of impact of moving circles inside one step.
+### All functions take plain floats and return time from now or None if nothing happens before limit
+
+def circlesImpact(dx, dy, vx, vy, r, limit):
+    ### Circle at relative position (dx, dy) moving with relative velocity (vx, vy) touches
+    ### the other one at distance r. Only approaching circles collide
+    approach = dx * vx + dy * vy
+    if approach >= 0:
+        return None
+
+    c = dx * dx + dy * dy - r * r
+    if c <= 0:
+        ### Already touching
+        return 0
+
+    a = vx * vx + vy * vy
+    disc = approach * approach - a * c
+    if disc < 0:
+        return None
+
+    t = c / (-approach + sqrt(disc))
+    return t if t <= limit else None
+
+def wallImpact(x, v, r, half, limit):
+    ### Circle of radius r at coordinate x moving with v reaches one of walls at -half and half
+    if v > 0:
+        gap = half - r - x
+    elif v < 0:
+        gap = x - r + half
+        v = -v
+    else:
+        return None
+
+    if gap <= 0:
+        return 0
+
+    t = gap / v
+    return t if t <= limit else None
@@ -0,0 +1,94 @@
+from math import sqrt, cos, sin
+from physics import Vec
+
+class SweepAndPrune:
+    ### Broad phase: finds pairs of objects with overlapping AABB.
+    ### Order of objects along x is kept between calls, objects move little per step and sorting of almost sorted list is linear
+    ### For a few objects exact checks of all pairs are cheaper than the broad phase itself
+    SMALL = 6
+
+    def __init__(self):
+        self.order = []
+        self.allPairs = []
+
+    def pairs(self, objects):
+        ### Sorted pairs of indices (i, j), i < j, of objects which may touch
+        if len(objects) <= self.SMALL:
+            if len(self.allPairs) != len(objects) * (len(objects) - 1) // 2:
+                self.allPairs = [(i, j) for i in range(len(objects)) for j in range(i + 1, len(objects))]
+            return self.allPairs
+
+        for obj in objects:
+            obj.updateAABB()
+
+        ### Plain lists of bounds, attributes lookups dominate otherwise
+        minX = [obj.AABB.min.x for obj in objects]
+        maxX = [obj.AABB.max.x for obj in objects]
+        minY = [obj.AABB.min.y for obj in objects]
+        maxY = [obj.AABB.max.y for obj in objects]
+
+        if len(self.order) != len(objects):
+            self.order = list(range(len(objects)))
+
+        self.order.sort(key=minX.__getitem__)
+
+        result = []
+        active = []
+        for i in self.order:
+            start = minX[i]
+
+            ### Drop boxes which end before this one starts
+            if active:
+                active = [j for j in active if maxX[j] >= start]
+
+            for j in active:
+                if maxY[j] >= minY[i] and minY[j] <= maxY[i]:
+                    result.append((i, j) if i < j else (j, i))
+
+            active.append(i)
+
+        result.sort()
+        return result
+
+def separate(first, second, collision):
+    ### Pushes circle objects out of each other and removes approaching velocity, split by inverse masses.
+    ### Static objects (zero inverse mass) do not move. Returns removed approaching speed
+    iMassSum = first.iMass + second.iMass
+    if iMassSum == 0:
+        return 0
+
+    normalX, normalY = cos(collision.dir), sin(collision.dir)
+
+    firstShare = first.iMass / iMassSum
+    secondShare = second.iMass / iMassSum
+    depth = collision.penetration
+    first.pos.x -= normalX * depth * firstShare
+    first.pos.y -= normalY * depth * firstShare
+    second.pos.x += normalX * depth * secondShare
+    second.pos.y += normalY * depth * secondShare
+
+    ### Approaching speed along normal, from first to second
+    approach = (first.vel.x - second.vel.x) * normalX + (first.vel.y - second.vel.y) * normalY
+    if approach <= 0:
+        return 0
+
+    if firstShare:
+        first.vel = Vec.fromXY(first.vel.x - normalX * approach * firstShare, first.vel.y - normalY * approach * firstShare)
+    if secondShare:
+        second.vel = Vec.fromXY(second.vel.x + normalX * approach * secondShare, second.vel.y + normalY * approach * secondShare)
+
+    return approach
+
+def bounce(obstacle, ball, collision):
+    ### Ball bounces from static obstacle as from walls, returns change of ball velocity
+    normalX, normalY = cos(collision.dir), sin(collision.dir)
+    ball.pos.x += normalX * collision.penetration
+    ball.pos.y += normalY * collision.penetration
+
+    velX, velY = ball.vel.x, ball.vel.y
+    proj = velX * normalX + velY * normalY
+    if proj >= 0:
+        return 0
+
+    ball.vel = Vec.fromXY((velX - 2 * proj * normalX) * ball.bounceFactor, (velY - 2 * proj * normalY) * ball.bounceFactor)
+    return sqrt((ball.vel.x - velX) ** 2 + (ball.vel.y - velY) ** 2)
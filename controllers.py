@@ -0,0 +1,301 @@
+import multiprocessing as mp
+import traceback
+from importlib import import_module
+from math import atan2, hypot, cos, sin, pi
+from time import perf_counter, sleep
+from worker import TripleBuffer
+
+### State sent to controllers: seq, time, ball x, y, velocity x, y, then x, y, angle and team of every robot
+STATE_HEADER = 6
+ROBOT_STATE = 4
+### Sensors readings of every robot follow when sensors are used, see sensors.Sensors.layout
+### Reply of controller: seq, then vel, dir and heading of every own robot, as for Robot.move
+COMMAND = 3
+
+def stateValues(engine, seq, sensors=None):
+    engine.syncBall()
+    ball = engine.ball
+
+    values = [seq, engine.time, ball.pos.x, ball.pos.y, ball.vel.x, ball.vel.y]
+    for robot in engine.robots:
+        values += [robot.pos.x, robot.pos.y, robot.angle, robot.team]
+
+    if sensors is not None:
+        readings = sensors.readEngine(engine)
+        for i in range(len(engine.robots)):
+            values += sensors.values(readings, i)
+
+    return values
+
+class TeamState:
+    ### What controller function gets, plain floats.
+    ### attack is x direction of the goal team scores into, team 0 attacks positive x by default.
+    ### sensors has readings of own robots as dicts when layout of sensors is given
+    def __init__(self, values, team, attack=None, layout=None):
+        self.attack = (1 if team == 0 else -1) if attack is None else attack
+        self.seq = int(values[0])
+        self.time = values[1]
+        self.ball = tuple(values[2:4])
+        self.ballVel = tuple(values[4:6])
+
+        sensorsSize = sum(size for name, size in layout) if layout else 0
+        robotsCount = (len(values) - STATE_HEADER) // (ROBOT_STATE + sensorsSize)
+        robotsEnd = STATE_HEADER + robotsCount * ROBOT_STATE
+
+        robots = [tuple(values[i:i + ROBOT_STATE]) for i in range(STATE_HEADER, robotsEnd, ROBOT_STATE)]
+        self.team = team
+        self.robots = [robot[:3] for robot in robots if robot[3] == team]
+        self.opponents = [robot[:3] for robot in robots if robot[3] != team]
+
+        self.sensors = []
+        if layout:
+            for i, robot in enumerate(robots):
+                if robot[3] == team:
+                    start = robotsEnd + i * sensorsSize
+                    self.sensors.append(splitReadings(values[start:start + sensorsSize], layout))
+
+def splitReadings(values, layout):
+    ### Dict of sensors readings from flat values of one robot
+    result = {}
+    i = 0
+    for name, size in layout:
+        result[name] = values[i] if name == 'compass' else tuple(values[i:i + size])
+        i += size
+
+    return result
+
+def loadController(spec):
+    ### "module:function", function gets TeamState and returns list of (vel, dir, heading) for own robots
+    moduleName, _, functionName = spec.partition(':')
+    if not functionName:
+        raise ValueError("Controller must be given as module:function, got %s" % spec)
+
+    return getattr(import_module(moduleName), functionName)
+
+def runController(spec, team, states, commands, ready, stop, robotsCount, layout=None):
+    ### Controller process: waits for new state, replies with commands for the same seq
+    function = loadController(spec)
+    ready.set()
+    lastSeq = -1
+    failed = False
+
+    while not stop.is_set():
+        values = states.read()
+        if values is None:
+            sleep(0.0002)
+            continue
+
+        state = TeamState(values, team, layout=layout)
+        if state.seq == lastSeq:
+            continue
+        lastSeq = state.seq
+
+        try:
+            result = list(function(state))
+        except Exception:
+            ### Report only the first error, the team just misses deadlines after it
+            if not failed:
+                traceback.print_exc()
+                failed = True
+            continue
+
+        reply = [state.seq] + [0.0] * (robotsCount * COMMAND)
+        for i, command in enumerate(result[:robotsCount]):
+            reply[1 + i * COMMAND:1 + (i + 1) * COMMAND] = [float(value) for value in command]
+
+        commands.write(reply)
+
+class Team:
+    def __init__(self, spec, team, robotsCount, statesSize, context, layout=None):
+        self.spec = spec
+        self.team = team
+        self.robotsCount = robotsCount
+
+        self.states = TripleBuffer(statesSize, context)
+        self.commands = TripleBuffer(1 + robotsCount * COMMAND, context)
+        self.ready = context.Event()
+        self.stop = context.Event()
+        self.process = context.Process(target=runController, daemon=True,
+            args=(spec, team, self.states, self.commands, self.ready, self.stop, robotsCount, layout))
+        self.process.start()
+
+        ### Commands in use, kept while controller does not answer
+        self.current = [(0, 0, 0)] * robotsCount
+        self.missed = 0
+        self.received = 0
+
+        ### Missed deadlines in a row, see ControllerHost.maxMisses
+        self.streak = 0
+
+class ControllerHost:
+    ### Runs control code of every team in own process, state and commands go through shared memory.
+    ### Physics never waits for a controller more than deadline seconds after state was published;
+    ### late replies are dropped and robots keep the last commands
+    def __init__(self, engine, specs, period=0.016, deadline=None, startTimeout=10, sensors=None, maxMisses=10):
+        ### specs is "module:function" for every team, robot.team is index in specs.
+        ### With sensors.Sensors controllers get their readings in TeamState.sensors.
+        ### Physics does not wait for dead controllers and for ones which missed maxMisses deadlines in a row,
+        ### their replies are only taken if they are ready, until one comes in time
+        context = mp.get_context('spawn')
+
+        self.period = period
+        self.deadline = period if deadline is None else deadline
+        self.maxMisses = maxMisses
+        self.nextTime = 0
+
+        self.seq = 0
+        self.published = None
+        self.sensors = sensors
+
+        layout = None if sensors is None else sensors.layout
+        statesSize = STATE_HEADER + (ROBOT_STATE + (0 if sensors is None else sensors.size)) * len(engine.robots)
+        self.teams = []
+        for team, spec in enumerate(specs):
+            robotsCount = sum(robot.team == team for robot in engine.robots)
+            self.teams.append(Team(spec, team, robotsCount, statesSize, context, layout))
+
+        ### Do not count imports of control code as missed deadlines
+        for team in self.teams:
+            if not team.ready.wait(startTimeout):
+                print("Controller %s is not ready after %s s" % (team.spec, startTimeout))
+
+    def collect(self):
+        ### Takes replies for the last published state, waiting for them until deadline
+        awaited = {team.team for team in self.teams if team.streak < self.maxMisses and team.process.is_alive()}
+        while True:
+            waiting = False
+            for team in self.teams:
+                if team.received == self.seq:
+                    continue
+
+                reply = team.commands.read()
+                if reply is not None and int(reply[0]) == self.seq:
+                    team.current = [tuple(reply[1 + i * COMMAND:1 + (i + 1) * COMMAND]) for i in range(team.robotsCount)]
+                    team.received = self.seq
+                elif team.team in awaited:
+                    waiting = True
+
+            if not waiting or perf_counter() - self.published > self.deadline:
+                break
+
+            sleep(0.0001)
+
+        for team in self.teams:
+            if team.received != self.seq:
+                team.missed += 1
+                team.streak += 1
+            else:
+                team.streak = 0
+
+    def control(self, engine):
+        ### Called by engine instead of mouse control, acts with fixed rate of simulated time
+        if engine.time + 1e-9 < self.nextTime:
+            return
+        self.nextTime = engine.time + self.period
+
+        if self.published is not None:
+            self.collect()
+
+        for team in self.teams:
+            robots = [robot for robot in engine.robots if robot.team == team.team]
+            for robot, (vel, dir, heading) in zip(robots, team.current):
+                robot.move(vel, dir, heading)
+
+        self.seq += 1
+        values = stateValues(engine, self.seq, self.sensors)
+        for team in self.teams:
+            team.states.write(values)
+        self.published = perf_counter()
+
+    def close(self):
+        for team in self.teams:
+            team.stop.set()
+
+        for team in self.teams:
+            team.process.join(1)
+            if team.process.is_alive():
+                team.process.terminate()
+
+class LocalControllers:
+    ### Same interface as ControllerHost, but control code runs in this process without deadlines,
+    ### e.g. in tournament workers which play many matches one after another
+    def __init__(self, specs, period=0.016, attacks=None, sensors=None):
+        self.functions = [loadController(spec) for spec in specs]
+        self.attacks = attacks or [None] * len(specs)
+        self.period = period
+        self.nextTime = 0
+        self.seq = 0
+        self.sensors = sensors
+        self.layout = None if sensors is None else sensors.layout
+
+        ### Controller errors by team, robots keep previous commands after an error
+        self.errors = [0] * len(specs)
+        self.current = [[] for spec in specs]
+
+    def control(self, engine):
+        if engine.time + 1e-9 < self.nextTime:
+            return
+        self.nextTime = engine.time + self.period
+
+        self.seq += 1
+        values = stateValues(engine, self.seq, self.sensors)
+        for team, function in enumerate(self.functions):
+            try:
+                self.current[team] = list(function(TeamState(values, team, self.attacks[team], self.layout)))
+            except Exception:
+                self.errors[team] += 1
+
+            robots = [robot for robot in engine.robots if robot.team == team]
+            for robot, (vel, dir, heading) in zip(robots, self.current[team]):
+                robot.move(vel, dir, heading)
+
+    def close(self):
+        pass
+
+def chaseBall(state):
+    ### Example controller, every robot goes to the ball
+    commands = []
+    for x, y, angle in state.robots:
+        dx, dy = x - state.ball[0], y - state.ball[1]
+        commands.append((min(hypot(dx, dy) * 3, 1), atan2(dx, dy), 0))
+
+    return commands
+
+def shootBall(state):
+    ### Example controller, every robot goes behind the ball and pushes it to the goal it attacks
+    ballX, ballY = state.ball
+    goalX = state.attack * 1.2
+    toGoalX, toGoalY = goalX - ballX, -ballY
+    length = hypot(toGoalX, toGoalY) or 1
+
+    commands = []
+    for x, y, angle in state.robots:
+        behindX = ballX - toGoalX / length * 0.15
+        behindY = ballY - toGoalY / length * 0.15
+
+        ### Already behind the ball, go through it
+        if hypot(x - behindX, y - behindY) < 0.05 or (x - ballX) * state.attack < -0.1 and abs(y - ballY) < 0.05:
+            targetX, targetY = ballX + toGoalX / length * 0.2, ballY + toGoalY / length * 0.2
+        else:
+            targetX, targetY = behindX, behindY
+
+        dx, dy = x - targetX, y - targetY
+        commands.append((min(hypot(dx, dy) * 4, 1.5), atan2(dx, dy), 0))
+
+    return commands
+
+def irChase(state):
+    ### Example controller which uses sensors only, run with --sensors: goes towards the strongest IR sensor,
+    ### sensors are expected evenly around the robot starting from its front
+    commands = []
+    for readings in state.sensors:
+        ir = readings['ir']
+        strongest = max(range(len(ir)), key=ir.__getitem__)
+        if ir[strongest] < 0.01:
+            commands.append((0, 0, 0))
+            continue
+
+        direction = readings['compass'] + 2 * pi * strongest / len(ir)
+        commands.append((min(1, 0.1 / ir[strongest]), atan2(-cos(direction), -sin(direction)), 0))
+
+    return commands
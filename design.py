@@ -1,92 +1,13 @@
 from PyQt5 import QtCore, QtGui, QtWidgets
-from PyQt5.QtGui import QPainter, QPen, QBrush
+from PyQt5.QtGui import QPainter, QPen, QBrush, QColor
 from PyQt5.QtCore import QTimer, Qt
 from palette import *
 from physics import *
 from robot import *
 from field import *
-from time import time
-
-class PhysEngine:
-    def __init__(self, simulationTime=0.001, simulationSpeed=1):
-        self.robots = [Robot()]
-        self.ball = Ball()
-        self.iterationsPerSecond = 1000 # Default value, will be autobalanced
-        self.targetSimulationTime = simulationTime / simulationSpeed
-        self.simulationSpeed = simulationSpeed
-
-        self.dir = 0
-        self.vel = 0.2
-
-    def updateSimulationParams(self, simulationTime, simulationSpeed):
-        self.targetSimulationTime = simulationTime / simulationSpeed
-        self.simulationSpeed = simulationSpeed
-
-    def update(self):
-        ts = time()
-
-        ### Calculate current time delta per iteration
-        dt = self.simulationSpeed / self.iterationsPerSecond
-        its = round(self.iterationsPerSecond * self.targetSimulationTime)
-
-        for i in range(its):
-            for robot in self.robots:
-                ### Apply orientation changes
-                robot.angle += robot.calcOmega() * dt
-
-                ### Calculate velocity
-                robot.vel = robot.calcVel()
-                robot.vel.dir += robot.angle
-
-                ### Detect and process touches
-                complete, normal = Field.touch(robot)
-                if complete:
-                    for nrm in normal:
-                        if angleDelta(robot.vel.dir, nrm) < PI / 2:
-                            robot.vel = getProj(robot.vel, nrm + PI / 2)
-
-                complete, normal = robot.touch(self.ball)
-                if complete:
-                    for nrm in normal:
-                        ### Go to robot local coordinate system
-                        lVel = self.ball.vel - robot.vel
-                        if angleDelta(lVel.dir, nrm) > PI / 2:
-                            print(self.ball.vel.size, self.robots[0].vel.size, lVel.size)
-                            self.ball.vel = getMirrorProj(lVel, nrm + PI / 2) * self.ball.bounceFactor + getProj(robot.vel, nrm)
-                            print(self.ball.vel.size)
-
-                ### Apply velocity
-                robot.pos += robot.vel * dt
-
-                ### Apply acceleration
-                for wheel in robot.wheels:
-                    wheel.update(dt)
-
-            ### Process touches
-            complete, normal = Field.touch(self.ball)
-            if complete:
-                for nrm in normal:
-                    if angleDelta(self.ball.vel.dir, nrm) < PI / 2:
-                        self.ball.vel = getMirrorProj(self.ball.vel, nrm + PI / 2) * self.ball.bounceFactor
-
-            ### Apply physics
-            self.ball.update(dt)
-
-        self.robots[0].move(self.vel, self.dir, 0)
-
-        ### CPU load balancing
-        if time() - ts > self.targetSimulationTime:
-            self.iterationsPerSecond /= 1.04
-        else:
-            self.iterationsPerSecond *= 1.04
-
-        if self.iterationsPerSecond <= (1 / self.targetSimulationTime):
-            self.iterationsPerSecond = (1 / self.targetSimulationTime)
-
-    def setRobotTarget(self, point):
-        delta = self.robots[0].pos - point
-        self.dir = atan2(delta.x, delta.y)
-        self.vel = delta.size()
+from engine import *
+from history import History
+from time import perf_counter
 
 class GraphEngine:
     def __init__(self, painter, engine, canvas):
@@ -94,82 +15,162 @@ class GraphEngine:
         self.engine = engine
         self.canvas = canvas
         self.size = Size(0, 0)
+        self.scaleFactor = 1
+
+        ### Background and field do not move, they are drawn once into pixmap
+        self.staticLayer = None
+        self.paletteVersion = None
+        self.fieldVersion = None
+
+    def createTools(self):
+        ### Pens and brushes are the same for every frame
+        self.noPen = QPen()
+        self.noPen.setStyle(Qt.NoPen)
+
+        self.backgroundPen = QPen(Palette(Grey))
+        self.backgroundBrush = QBrush(Palette(LightGrey))
+        self.backgroundBrush.setStyle(Qt.BDiagPattern)
+
+        self.fieldBoundPen = QPen(QColor(5, 5, 5))
+        self.fieldBoundPen.setWidth(3)
+        self.fieldBoundPen.setJoinStyle(Qt.RoundJoin)
+        self.fieldBrush = QBrush(Palette(Green))
+
+        self.linePen = QPen(Palette(White))
+        self.linePen.setWidthF(max(Field.lineWidth * self.scaleFactor, 1))
+        self.lineBrush = QBrush(Palette(White))
+
+        ### Dark and transparent color for border of robots
+        self.robotPen = QPen(QColor(64, 64, 64, 64))
+        self.robotBrush = QBrush(Palette(Grey))
+        self.robotDirPen = QPen(Palette(DarkGrey))
+        self.robotDirPen.setWidth(1)
+
+        self.ballBrush = QBrush(Palette(Red))
+        self.obstacleBrush = QBrush(Palette(DarkGrey))
+
+    def renderStatic(self):
+        self.createTools()
+        self.paletteVersion = Palette.version
+        self.fieldVersion = Field.version
+
+        ### Pixmaps need a running application, offscreen rendering (no canvas) uses image
+        width, height = max(int(self.size.width), 1), max(int(self.size.height), 1)
+        if self.canvas is None:
+            self.staticLayer = QtGui.QImage(width, height, QtGui.QImage.Format_ARGB32_Premultiplied)
+        else:
+            self.staticLayer = QtGui.QPixmap(width, height)
+        self.staticLayer.fill(Qt.transparent)
 
-    def draw(self):
-        self.painter.begin(self.canvas)
-        self.painter.setRenderHints(QPainter.Antialiasing | QPainter.TextAntialiasing | QPainter.SmoothPixmapTransform)
-
-        noPen = QPen()
-        noPen.setStyle(Qt.NoPen)
+        painter = QPainter(self.staticLayer)
+        painter.setRenderHints(QPainter.Antialiasing)
 
         ### Draw Background
-        backgroundPen = QPen(Palette(Grey))
+        painter.setPen(self.backgroundPen)
+        painter.setBrush(self.backgroundBrush)
+        painter.drawRect(QtCore.QRectF(0, 0, self.size.width, self.size.height))
 
-        backgroundBrush = QBrush(Palette(LightGrey))
-        backgroundBrush.setStyle(Qt.BDiagPattern)
+        ### Draw field
+        painter.setPen(self.fieldBoundPen)
+        painter.setBrush(self.fieldBrush)
 
-        self.painter.setPen(backgroundPen)
-        self.painter.setBrush(backgroundBrush)
+        fieldBoundX, fieldBoundY = self.transform(-Field.size / 2)
+        painter.drawRect(QtCore.QRectF(fieldBoundX, fieldBoundY, Field.size.width * self.scaleFactor, Field.size.height * self.scaleFactor))
 
-        self.painter.drawRect(0, 0, self.size.width, self.size.height)
+        ### Draw painted lines, center circle and neutral spots
+        painter.setPen(self.linePen)
+        painter.setBrush(Qt.NoBrush)
 
-        ### Draw field
-        fieldBoundPen = QPen(QColor(5, 5, 5))
-        fieldBoundPen.setWidth(3)
-        fieldBoundPen.setJoinStyle(Qt.RoundJoin)
+        for x1, y1, x2, y2 in Field.lines:
+            painter.drawLine(QtCore.QPointF(*self.transform(Point(x1, y1))), QtCore.QPointF(*self.transform(Point(x2, y2))))
 
-        self.painter.setPen(fieldBoundPen)
-        self.painter.setBrush(Palette(Green))
+        x, y = self.transform(Point(0, 0))
+        painter.drawEllipse(QtCore.QPointF(x, y), Field.centerCircle * self.scaleFactor, Field.centerCircle * self.scaleFactor)
 
-        fieldBoundX, fieldBoundY = self.transform(-Field.size / 2)
-        self.painter.drawRect(fieldBoundX, fieldBoundY, Field.size.width * self.scaleFactor, Field.size.height * self.scaleFactor)
+        painter.setPen(self.noPen)
+        painter.setBrush(self.lineBrush)
+        for spot in Field.neutralSpots:
+            x, y = self.transform(spot)
+            painter.drawEllipse(QtCore.QPointF(x, y), Field.lineWidth * self.scaleFactor, Field.lineWidth * self.scaleFactor)
 
+        ### Draw obstacles, they do not move too
+        painter.setPen(self.noPen)
+        painter.setBrush(self.obstacleBrush)
+
+        for obstacle in Field.goalWalls + Field.obstacles:
+            if isinstance(obstacle, Circle):
+                x, y = self.transform(obstacle.pos)
+                painter.drawEllipse(QtCore.QPointF(x, y), obstacle.r * self.scaleFactor, obstacle.r * self.scaleFactor)
+            else:
+                obstacle.updateAABB()
+                x, y = self.transform(obstacle.AABB.min)
+                painter.drawRect(QtCore.QRectF(x, y, obstacle.size.width * self.scaleFactor, obstacle.size.height * self.scaleFactor))
+
+        painter.end()
+
+    def draw(self):
+        self.painter.begin(self.canvas)
+        self.paint(self.painter)
+        self.painter.end()
+
+    def paint(self, painter):
+        ### Draws current frame with any painter, widget or offscreen image
+        if self.staticLayer is None or self.paletteVersion != Palette.version or self.fieldVersion != Field.version:
+            self.renderStatic()
+
+        painter.setRenderHints(QPainter.Antialiasing | QPainter.TextAntialiasing | QPainter.SmoothPixmapTransform)
+
+        if self.canvas is None:
+            painter.drawImage(0, 0, self.staticLayer)
+        else:
+            painter.drawPixmap(0, 0, self.staticLayer)
 
         ### Draw robots
+        painter.setPen(self.robotPen)
+        painter.setBrush(self.robotBrush)
+
         for robot in self.engine.robots:
             ### Apply radius (scale) transformation
             r = robot.r * self.scaleFactor
 
             ### Apply coordinates transformation
-            posX, posY = self.transform(robot.pos)
-
-            self.painter.save()
-
-            self.painter.translate(posX, posY)
+            posX, posY = self.transform(self.interpolate(robot.prevPos, robot.pos))
 
-            self.painter.rotate(robot.angle * RAD2DEG)
+            painter.save()
 
-            ### Set dark and transparent color for border of robots
-            self.painter.setPen(QPen(QColor(64, 64, 64, 64)))
-            self.painter.setBrush(Palette(Grey))
+            painter.translate(posX, posY)
 
-            self.painter.drawEllipse(-r, -r, r * 2, r * 2)
+            painter.rotate(self.interpolate(robot.prevAngle, robot.angle) * RAD2DEG)
 
-            pen = QPen(Palette(DarkGrey))
-            pen.setWidth(1)
+            painter.drawEllipse(QtCore.QPointF(0, 0), r, r)
 
-            self.painter.setPen(pen)
-            self.painter.setBrush(Palette(DarkGrey))
+            painter.setPen(self.robotDirPen)
+            painter.drawLine(QtCore.QLineF(0, 0, r * 0.7, 0))
 
-            self.painter.drawLine(0, 0, r * 0.7, 0)
-
-            self.painter.restore()
+            painter.restore()
 
         ### Draw ball
-        self.painter.setPen(noPen)
-        self.painter.setBrush(Palette(Red))
+        painter.setPen(self.noPen)
+        painter.setBrush(self.ballBrush)
 
         r = self.engine.ball.r * self.scaleFactor
-        x, y = self.transform(self.engine.ball.pos)
-        self.painter.drawEllipse(x - r, y - r, r * 2, r * 2)
-
-        self.painter.end()
+        x, y = self.transform(self.interpolate(self.engine.ball.prevPos, self.engine.ball.pos))
+        painter.drawEllipse(QtCore.QPointF(x, y), r, r)
 
     def resizeEvent(self, e):
-        self.size = Size(e.size().width(), e.size().height())
+        self.resize(e.size().width(), e.size().height())
+
+    def resize(self, width, height):
+        self.size = Size(width, height)
 
         self.scaleFactor = (self.size.width - 10) / Field.size.width
 
+        self.renderStatic()
+
+    def interpolate(self, prev, current):
+        ### Physics runs with own step, draw objects between two last steps
+        return prev + (current - prev) * self.engine.alpha
+
     def transform(self, point):
         return (self.size / 2) + point * self.scaleFactor
 
@@ -182,33 +183,222 @@ class CanvasArea(QtWidgets.QWidget):
         super(QtWidgets.QWidget, self).__init__(*args)
 
         TIME_PER_FRAME_MS = 16
-        QUALITY_PERFORMANCE = 10
+        PHYSICS_STEP = 0.001
 
-        self.pEngine = PhysEngine(TIME_PER_FRAME_MS / (1000 * 2), QUALITY_PERFORMANCE)
+        self.pEngine = PhysEngine(fixedStep=PHYSICS_STEP)
+        self.pEngine.history = History(self.pEngine)
+
+        ### Physics stands still, history may be scrubbed
+        self.paused = False
 
         self.gEngine = GraphEngine(QPainter(), self.pEngine, self)
 
         self.mainTimer = QTimer(self, timeout=self.systemUpdate, interval=TIME_PER_FRAME_MS)
         self.mainTimer.start()
 
+        ### Frame rate, measured independently from physics
+        self.fps = 0
+        self.frames = 0
+        self.framesStart = perf_counter()
+
+        ### Time the first frame was drawn, see main.py --startup-time
+        self.firstFrame = None
+
         self.setMouseTracking(True)
 
+    def setEngine(self, engine):
+        if hasattr(self.pEngine, 'close'):
+            self.pEngine.close()
+
+        self.pEngine = engine
+        self.gEngine.engine = engine
+        self.paused = False
+
+    def loadReplay(self, path):
+        ### Show recorded match instead of simulation
+        from recorder import ReplayEngine
+
+        self.setEngine(ReplayEngine(path))
+
+    def useWorkerProcess(self):
+        ### Physics runs in another process, canvas draws the latest published state
+        from worker import WorkerEngine
+
+        self.setEngine(WorkerEngine(len(self.pEngine.robots)))
+
+    @property
+    def history(self):
+        ### Replay and worker engines have no history
+        return getattr(self.pEngine, 'history', None)
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        ### Simulation continues from the shown tick, later history is dropped
+        if self.history is not None:
+            self.history.truncate(self.pEngine.tick)
+            self.pEngine.lastUpdate = None
+            self.pEngine.accumulator = 0
+
+        self.paused = False
+
+    def seek(self, tick):
+        self.pEngine.restore(self.history.stateAt(tick))
+        self.pEngine.storePrevious()
+        self.pEngine.alpha = 1
+
     def systemUpdate(self, *args):
-        self.pEngine.update()
+        if not self.paused:
+            behind = self.pEngine.behind
+            self.pEngine.update()
+
+            if self.pEngine.behind and not behind:
+                print("Simulation is slower than real time, %.3f s dropped so far" % self.pEngine.droppedTime)
+
         self.update()
 
     def paintEvent(self, event):
         self.gEngine.draw()
 
+        self.frames += 1
+        now = perf_counter()
+        if self.firstFrame is None:
+            self.firstFrame = now
+
+        if now - self.framesStart >= 1:
+            self.fps = self.frames / (now - self.framesStart)
+            self.frames = 0
+            self.framesStart = now
+
     def resizeEvent(self, event):
         self.gEngine.resizeEvent(event)
 
     def mousePressEvent(self, event):
-        print(event.x(), event.y())
-
         self.pEngine.setRobotTarget(self.gEngine.reverseTransform(Point(event.x(), event.y())))
 
 
+class ProfilerPanel(QtWidgets.QWidget):
+    def __init__(self, canvas, *args):
+        super(QtWidgets.QWidget, self).__init__(*args)
+
+        self.canvas = canvas
+
+        self.enableBox = QtWidgets.QCheckBox("Profile physics", self)
+        self.enableBox.toggled.connect(self.setProfiling)
+        self.jsonButton = QtWidgets.QPushButton("Export JSON", self, clicked=self.exportJSON)
+        self.foldedButton = QtWidgets.QPushButton("Export flame graph", self, clicked=self.exportFolded)
+
+        self.label = QtWidgets.QLabel(self)
+        self.label.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+
+        buttons = QtWidgets.QHBoxLayout()
+        buttons.addWidget(self.enableBox)
+        buttons.addWidget(self.jsonButton)
+        buttons.addWidget(self.foldedButton)
+        buttons.addStretch()
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addLayout(buttons)
+        layout.addWidget(self.label)
+        layout.addStretch()
+
+        self.timer = QTimer(self, timeout=self.refresh, interval=500)
+        self.timer.start()
+
+    @property
+    def profiler(self):
+        ### Replay and worker engines are not profiled
+        return getattr(self.canvas.pEngine, 'profiler', False)
+
+    def setProfiling(self, enabled):
+        if self.profiler is False:
+            return
+
+        if self.profiler is None:
+            from profiler import Profiler
+
+            self.canvas.pEngine.profiler = Profiler()
+
+        self.profiler.enabled = enabled
+        self.profiler.reset()
+
+    def refresh(self):
+        text = "fps %.1f" % self.canvas.fps
+        if self.profiler is False:
+            text += "\nprofiling is not available for this engine"
+        elif self.profiler is not None and self.profiler.enabled:
+            text += "\n" + self.profiler.summary()
+
+        self.label.setText(text)
+
+    def exportJSON(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export profile", "profile.json", "JSON (*.json)")
+        if path and self.profiler:
+            self.profiler.toJSON(path)
+
+    def exportFolded(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export flame graph", "profile.folded", "Folded stacks (*.folded)")
+        if path and self.profiler:
+            self.profiler.toFolded(path)
+
+
+class TimelinePanel(QtWidgets.QWidget):
+    def __init__(self, canvas, *args):
+        super(QtWidgets.QWidget, self).__init__(*args)
+
+        self.canvas = canvas
+
+        self.pauseButton = QtWidgets.QPushButton("Pause", self, clicked=self.togglePause)
+        self.slider = QtWidgets.QSlider(Qt.Horizontal, self)
+        self.slider.valueChanged.connect(self.scrub)
+        self.label = QtWidgets.QLabel(self)
+        self.label.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+
+        layout = QtWidgets.QHBoxLayout(self)
+        layout.addWidget(self.pauseButton)
+        layout.addWidget(self.slider)
+        layout.addWidget(self.label)
+
+        self.timer = QTimer(self, timeout=self.refresh, interval=100)
+        self.timer.start()
+
+    def togglePause(self):
+        if self.canvas.paused:
+            self.canvas.resume()
+        else:
+            self.canvas.pause()
+
+        self.refresh()
+
+    def scrub(self, tick):
+        ### Only paused simulation is rewound, slider follows time otherwise
+        if self.canvas.paused and self.canvas.history is not None:
+            self.canvas.seek(tick)
+            self.showTime()
+
+    def showTime(self):
+        history = self.canvas.history
+        self.label.setText("%7.3f s  kept %.1f s, %.1f kB" % (self.canvas.pEngine.time, (history.lastTick - history.firstTick) * history.dt,
+                                                            history.bytes / 1024))
+
+    def refresh(self):
+        history = self.canvas.history
+        self.setEnabled(history is not None)
+        self.pauseButton.setText("Resume" if self.canvas.paused else "Pause")
+        if history is None:
+            self.label.setText("rewind is not available for this engine")
+            return
+
+        self.slider.blockSignals(True)
+        self.slider.setRange(history.firstTick, history.lastTick)
+        if not self.canvas.paused:
+            self.slider.setValue(self.canvas.pEngine.tick)
+        self.slider.blockSignals(False)
+
+        self.showTime()
+
+
 class Ui_MainWindow(object):
     def setupUi(self, MainWindow):
         MainWindow.setObjectName("MainWindow")
@@ -245,6 +435,11 @@ class Ui_MainWindow(object):
         self.scrollAreaWidgetContents = QtWidgets.QWidget()
         self.scrollAreaWidgetContents.setGeometry(QtCore.QRect(0, 0, 864, 174))
         self.scrollAreaWidgetContents.setObjectName("scrollAreaWidgetContents")
+        self.infoLayout = QtWidgets.QVBoxLayout(self.scrollAreaWidgetContents)
+        self.timelinePanel = TimelinePanel(self.canvasArea, self.scrollAreaWidgetContents)
+        self.infoLayout.addWidget(self.timelinePanel)
+        self.profilerPanel = ProfilerPanel(self.canvasArea, self.scrollAreaWidgetContents)
+        self.infoLayout.addWidget(self.profilerPanel)
         self.infoArea.setWidget(self.scrollAreaWidgetContents)
         self.gridLayout.addWidget(self.splitter_2, 0, 0, 1, 1)
         MainWindow.setCentralWidget(self.centralwidget)
@@ -0,0 +1,562 @@
+from physics import *
+from robot import *
+from field import *
+from ballistics import FreeBall
+from ccd import circlesImpact, wallImpact
+from collisions import SweepAndPrune, separate, bounce
+from events import CONTACT, WALL, POSSESSION, WALL_ID, NOBODY
+from array import array
+from time import time, perf_counter, perf_counter_ns
+
+class PhysEngine:
+    ### Ball sleeps only if nothing can happen for at least that time, seconds
+    MIN_BALL_SLEEP = 0.005
+
+    ### Most of contacts of ball in one step with continuous collisions, robot pushing ball into wall bounces it forever
+    MAX_IMPACTS = 8
+
+    def __init__(self, simulationTime=0.001, simulationSpeed=1, robotsCount=1, fixedStep=None, maxStepsPerUpdate=100, eventDrivenBall=False, continuous=False):
+        self.robots = [Robot() for i in range(robotsCount)]
+        self.ball = Ball()
+        self.iterationsPerSecond = 1000 # Default value, will be autobalanced
+        self.targetSimulationTime = simulationTime / simulationSpeed
+        self.simulationSpeed = simulationSpeed
+        self.tick = 0
+        self.time = 0
+
+        ### Fixed timestep mode, physics time follows wall time with constant dt
+        self.fixedStep = fixedStep
+        self.maxStepsPerUpdate = maxStepsPerUpdate
+        self.accumulator = 0
+        self.lastUpdate = None
+
+        ### Position between previous and current step for rendering, 1 means current
+        self.alpha = 1
+
+        ### Set when simulation is slower than real time and steps were dropped
+        self.behind = False
+        self.behindUpdates = 0
+        self.droppedTime = 0
+
+        ### Event driven mode, between contacts the ball moves by closed form instead of steps
+        self.eventDrivenBall = eventDrivenBall
+        self.freeBall = None
+        self.ballWake = 0
+
+        ### Contacts are found at exact time inside step, so dt may be much larger
+        self.continuous = continuous
+
+        ### Robots, ball and field obstacles which may touch each other
+        self.broadPhase = SweepAndPrune()
+
+        ### Recorder.record is called after every step
+        self.recorder = None
+
+        ### Phases of steps are measured when profiler is set and enabled
+        self.profiler = None
+
+        ### ControllerHost drives robots instead of mouse target when set
+        self.controllers = None
+
+        ### Contacts, wall hits and possession changes go to EventLog when it is set
+        self.events = None
+        self.possession = NOBODY
+
+        ### History.record is called after every control, wheels targets are the only input of physics
+        self.history = None
+
+        self.dir = 0
+        self.vel = 0.2
+
+        self.storePrevious()
+
+    def updateSimulationParams(self, simulationTime, simulationSpeed):
+        self.targetSimulationTime = simulationTime / simulationSpeed
+        self.simulationSpeed = simulationSpeed
+
+    def step(self, dt):
+        if self.continuous:
+            self.stepContinuous(dt)
+            return
+
+        if self.profiler is not None and self.profiler.enabled:
+            self.stepProfiled(dt)
+            return
+
+        ballAsleep = self.beginStep(dt)
+
+        for robot in self.robots:
+            self.robotKinematics(robot, dt)
+            self.robotWallContact(robot)
+
+        self.contacts(ballAsleep)
+
+        for robot in self.robots:
+            self.robotIntegration(robot, dt)
+            self.robotWheels(robot, dt)
+
+        self.endStep(dt, ballAsleep)
+
+    def stepProfiled(self, dt):
+        ### Same as step, but measures every phase
+        profiler = self.profiler
+        clock = perf_counter_ns
+
+        ballAsleep = self.beginStep(dt)
+
+        for robot in self.robots:
+            t0 = clock()
+            self.robotKinematics(robot, dt)
+            t1 = clock()
+            self.robotWallContact(robot)
+            t2 = clock()
+
+            profiler.add('kinematics', t1 - t0)
+            profiler.add('wallContact', t2 - t1)
+
+        t0 = clock()
+        self.contacts(ballAsleep)
+        profiler.add('contacts', clock() - t0)
+
+        for robot in self.robots:
+            t0 = clock()
+            self.robotIntegration(robot, dt)
+            t1 = clock()
+            self.robotWheels(robot, dt)
+            t2 = clock()
+
+            profiler.add('integration', t1 - t0)
+            profiler.add('wheels', t2 - t1)
+
+        t0 = clock()
+        self.endStep(dt, ballAsleep)
+        profiler.add('ball', clock() - t0)
+        profiler.steps += 1
+
+    def stepContinuous(self, dt):
+        ### Same as step, but ball moves from contact to contact and robots stop at walls
+        ballAsleep = self.beginStep(dt)
+
+        for robot in self.robots:
+            self.robotKinematics(robot, dt)
+            self.robotWallContact(robot)
+
+        ### Ball touches robots in sweepBall, contacts skip these pairs in continuous mode
+        self.contacts(ballAsleep)
+
+        if not ballAsleep:
+            self.sweepBall(dt)
+
+        for robot in self.robots:
+            self.robotSweep(robot, dt)
+            self.robotWheels(robot, dt)
+
+        self.time += dt
+
+        if not ballAsleep and self.eventDrivenBall:
+            self.planBall()
+
+        if self.recorder is not None:
+            self.recorder.record(self)
+
+    def beginStep(self, dt):
+        self.tick += 1
+
+        ### Nothing can touch the ball during this step
+        ballAsleep = self.freeBall is not None and self.time + dt < self.ballWake
+        if self.freeBall is not None and not ballAsleep:
+            self.wakeBall()
+
+        return ballAsleep
+
+    def robotKinematics(self, robot, dt):
+        ### Apply orientation changes
+        robot.angle += robot.calcOmega() * dt
+
+        ### Calculate velocity
+        robot.vel = robot.calcVel()
+        robot.vel.dir += robot.angle
+
+    def emit(self, type, a, b, angle, impulse):
+        self.events.emit(self.tick, type, a, b, cos(angle), sin(angle), impulse)
+
+    def touchBall(self, index):
+        if index != self.possession:
+            self.events.emit(self.tick, POSSESSION, index, self.possession)
+            self.possession = index
+
+    def robotWallContact(self, robot):
+        ### Detect and process touches
+        complete, normal = Field.touch(robot)
+        if self.events is not None and complete != robot.touchingWall:
+            ### Only the beginning of touch is an event
+            robot.touchingWall = complete
+            if complete:
+                self.emit(WALL, self.robots.index(robot), WALL_ID, normal[0], robot.vel.size)
+
+        if complete:
+            for nrm in normal:
+                if angleDelta(robot.vel.dir, nrm) < PI / 2:
+                    robot.vel = getProj(robot.vel, nrm + PI / 2)
+
+    def contacts(self, ballAsleep):
+        ### Broad phase finds objects which may touch, then they are checked exactly
+        robots = self.robots
+        ball = self.ball
+        bodies = robots + [ball] + Field.obstacles
+        ballIndex = len(robots)
+
+        ### Robots push each other first, then they touch the ball in the order of robots list, as World does
+        ballPairs = []
+        for i, j in self.broadPhase.pairs(bodies):
+            if j < ballIndex:
+                collision = robots[i].collide(robots[j])
+                if collision is not None:
+                    impulse = separate(robots[i], robots[j], collision)
+                    if impulse and self.events is not None:
+                        self.emit(CONTACT, i, j, collision.dir, impulse)
+
+            elif i < ballIndex and j > ballIndex:
+                collision = bodies[j].collide(robots[i])
+                if collision is not None:
+                    impulse = separate(bodies[j], robots[i], collision)
+                    if impulse and self.events is not None:
+                        self.emit(CONTACT, j, i, collision.dir, impulse)
+
+            elif i <= ballIndex and not ballAsleep:
+                ballPairs.append((i, j))
+
+        for i, j in ballPairs:
+            if j == ballIndex:
+                if not self.continuous:
+                    self.robotBallContact(robots[i])
+            elif not (self.continuous and isinstance(bodies[j], Circle)):
+                collision = bodies[j].collide(ball)
+                if collision is not None:
+                    impulse = bounce(bodies[j], ball, collision)
+                    if impulse and self.events is not None:
+                        self.emit(CONTACT, j, ballIndex, collision.dir, impulse)
+
+    def robotBallContact(self, robot):
+        complete, normal = robot.touch(self.ball)
+        if complete:
+            for nrm in normal:
+                ### Go to robot local coordinate system
+                lVel = self.ball.vel - robot.vel
+                if angleDelta(lVel.dir, nrm) > PI / 2:
+                    before = self.ball.vel
+                    self.ball.vel = getMirrorProj(lVel, nrm + PI / 2) * self.ball.bounceFactor + getProj(robot.vel, nrm)
+
+                    if self.events is not None:
+                        index = self.robots.index(robot)
+                        self.emit(CONTACT, index, len(self.robots), nrm, (self.ball.vel - before).size)
+                        self.touchBall(index)
+
+    def robotIntegration(self, robot, dt):
+        ### Apply velocity
+        robot.pos.addScaled(robot.vel, dt)
+
+    def robotSweep(self, robot, dt):
+        ### Apply velocity, but not further than walls
+        velX, velY = robot.vel.x, robot.vel.y
+        impactX = wallImpact(robot.pos.x, velX, robot.r, Field.size.x / 2, dt)
+        impactY = wallImpact(robot.pos.y, velY, robot.r, Field.size.y / 2, dt)
+
+        robot.pos.x += velX * (dt if impactX is None else impactX)
+        robot.pos.y += velY * (dt if impactY is None else impactY)
+
+    def robotWheels(self, robot, dt):
+        ### Apply acceleration
+        for wheel in robot.wheels:
+            wheel.update(dt)
+
+    def endStep(self, dt, ballAsleep):
+        self.time += dt
+
+        if not ballAsleep:
+            self.stepBall(dt)
+
+        if self.recorder is not None:
+            self.recorder.record(self)
+
+    def stepBall(self, dt):
+        self.ballWallContact()
+
+        ### Apply physics
+        self.ball.update(dt)
+
+        if self.eventDrivenBall:
+            self.planBall()
+
+    def ballWallContact(self):
+        ### Process touches
+        complete, normal = Field.touch(self.ball)
+        if complete:
+            for nrm in normal:
+                if angleDelta(self.ball.vel.dir, nrm) < PI / 2:
+                    before = self.ball.vel
+                    self.ball.vel = getMirrorProj(self.ball.vel, nrm + PI / 2) * self.ball.bounceFactor
+
+                    if self.events is not None:
+                        self.emit(WALL, len(self.robots), WALL_ID, nrm, (self.ball.vel - before).size)
+
+    def sweepBall(self, dt):
+        ### Moves ball through the step from one contact to the next one, robots move with constant velocity.
+        ### Goals are thicker than the ball moves in a step, their touches are found at the start of step
+        self.ballWallContact()
+
+        ball = self.ball
+        x, y, velX, velY = ball.pos.x, ball.pos.y, ball.vel.x, ball.vel.y
+        halfWidth, halfHeight = Field.size.x / 2, Field.size.y / 2
+        robots = [(robot.pos.x, robot.pos.y, robot.vel.x, robot.vel.y, robot.r + ball.r, i) for i, robot in enumerate(self.robots)]
+
+        ### Circle obstacles are swept as standing robots, which bounce the ball as collisions.bounce does,
+        ### their indices are the ones of contacts
+        robots += [(obstacle.pos.x, obstacle.pos.y, 0, 0, obstacle.r + ball.r, len(self.robots) + 1 + i)
+                   for i, obstacle in enumerate(Field.obstacles) if isinstance(obstacle, Circle)]
+
+        t = 0
+        for i in range(self.MAX_IMPACTS):
+            first = dt - t
+            hit = None
+
+            for robotX, robotY, robotVelX, robotVelY, r, index in robots:
+                impact = circlesImpact(x - robotX - robotVelX * t, y - robotY - robotVelY * t, velX - robotVelX, velY - robotVelY, r, first)
+                if impact is not None and (hit is None or impact < first):
+                    first, hit = impact, (index, robotX + robotVelX * (t + impact), robotY + robotVelY * (t + impact), robotVelX, robotVelY)
+
+            impact = wallImpact(x, velX, ball.r, halfWidth, first)
+            if impact is not None and (hit is None or impact < first):
+                first, hit = impact, 'x'
+
+            impact = wallImpact(y, velY, ball.r, halfHeight, first)
+            if impact is not None and (hit is None or impact < first):
+                first, hit = impact, 'y'
+
+            x += velX * first
+            y += velY * first
+            t += first
+
+            if hit is None:
+                break
+
+            ### Same responses as in stepBall and robotBallContact
+            beforeX, beforeY = velX, velY
+            if hit == 'x':
+                velX, velY = -velX * ball.bounceFactor, velY * ball.bounceFactor
+            elif hit == 'y':
+                velX, velY = velX * ball.bounceFactor, -velY * ball.bounceFactor
+            else:
+                index, robotX, robotY, robotVelX, robotVelY = hit
+                normalX, normalY = x - robotX, y - robotY
+                distance = sqrt(normalX * normalX + normalY * normalY)
+                normalX /= distance
+                normalY /= distance
+
+                lVelX, lVelY = velX - robotVelX, velY - robotVelY
+                lProj = lVelX * normalX + lVelY * normalY
+                push = robotVelX * normalX + robotVelY * normalY
+                velX = (lVelX - 2 * lProj * normalX) * ball.bounceFactor + push * normalX
+                velY = (lVelY - 2 * lProj * normalY) * ball.bounceFactor + push * normalY
+
+            if self.events is not None:
+                impulse = sqrt((velX - beforeX) ** 2 + (velY - beforeY) ** 2)
+                if hit == 'x':
+                    self.emit(WALL, len(self.robots), WALL_ID, 0 if beforeX > 0 else PI, impulse)
+                elif hit == 'y':
+                    self.emit(WALL, len(self.robots), WALL_ID, PI / 2 if beforeY > 0 else -PI / 2, impulse)
+                else:
+                    self.emit(CONTACT, index, len(self.robots), atan2(normalY, normalX), impulse)
+                    if index < len(self.robots):
+                        self.touchBall(index)
+
+        ball.pos.x, ball.pos.y = x, y
+        ball.vel = Vec.fromXY(velX, velY)
+
+        ### Ball friction, see Ball.update
+        ball.vel.size = max(ball.vel.size - ball.friction * dt, 0)
+
+    def control(self):
+        if self.controllers is not None:
+            self.controllers.control(self)
+        else:
+            self.robots[0].move(self.vel, self.dir, 0)
+
+        if self.history is not None:
+            self.history.record(self)
+
+        ### Wheels targets changed, robots may reach the ball earlier
+        if self.freeBall is not None:
+            self.wakeBall()
+            self.planBall()
+
+    def wakeBall(self):
+        self.freeBall.apply(self.ball, self.time)
+        self.freeBall = None
+
+    def syncBall(self):
+        ### Updates ball position without waking it, e.g. for drawing
+        if self.freeBall is not None:
+            self.freeBall.apply(self.ball, self.time)
+
+    def planBall(self):
+        free = FreeBall(self.ball, self.time)
+        wake = free.wallTime(Field.size)
+        for obj in Field.goalWalls + Field.obstacles:
+            wake = min(wake, free.boxTime(obj.AABB))
+
+        ### The earliest time any robot can touch the ball, wheels speeds are limited by current speeds and targets.
+        ### A robot pushed by another one moves no faster than the pusher, so every robot may move as the fastest one
+        robotVel = max(sum(max(abs(wheel.vel), abs(wheel.target)) for wheel in robot.wheels) for robot in self.robots)
+        robotVel += FRICTION * len(self.robots[0].wheels)
+        for robot in self.robots:
+            gap = (self.ball.pos - robot.pos).size() - robot.r - self.ball.r
+            wake = min(wake, self.time + gap / (robotVel + free.speed + 1e-9))
+
+        if wake - self.time > self.MIN_BALL_SLEEP:
+            self.freeBall = free
+            self.ballWake = wake
+
+    def storePrevious(self):
+        self.syncBall()
+
+        for obj in self.robots + [self.ball]:
+            obj.prevPos = Point(obj.pos.x, obj.pos.y)
+            obj.prevAngle = getattr(obj, 'angle', 0)
+
+    def updateFixed(self):
+        now = perf_counter()
+        if self.lastUpdate is not None:
+            self.accumulator += (now - self.lastUpdate) * self.simulationSpeed
+        self.lastUpdate = now
+
+        its = int(self.accumulator / self.fixedStep)
+        self.accumulator -= its * self.fixedStep
+
+        ### Do not try to catch up forever, report and drop the rest
+        self.behind = its > self.maxStepsPerUpdate
+        if self.behind:
+            self.behindUpdates += 1
+            self.droppedTime += (its - self.maxStepsPerUpdate) * self.fixedStep
+            its = self.maxStepsPerUpdate
+
+        for i in range(its):
+            if i == its - 1:
+                self.storePrevious()
+
+            self.step(self.fixedStep)
+
+        self.alpha = self.accumulator / self.fixedStep
+
+        self.control()
+
+    def update(self):
+        if self.fixedStep is not None:
+            self.updateFixed()
+            return
+
+        ts = time()
+
+        ### Calculate current time delta per iteration
+        dt = self.simulationSpeed / self.iterationsPerSecond
+        its = round(self.iterationsPerSecond * self.targetSimulationTime)
+
+        for i in range(its):
+            self.step(dt)
+
+        self.control()
+
+        ### CPU load balancing
+        if time() - ts > self.targetSimulationTime:
+            self.iterationsPerSecond /= 1.04
+        else:
+            self.iterationsPerSecond *= 1.04
+
+        if self.iterationsPerSecond <= (1 / self.targetSimulationTime):
+            self.iterationsPerSecond = (1 / self.targetSimulationTime)
+
+    def setRobotTarget(self, point):
+        delta = self.robots[0].pos - point
+        self.dir = atan2(delta.x, delta.y)
+        self.vel = delta.size()
+
+    def snapshot(self):
+        ### Whole dynamic state as flat array of floats, see restore
+        self.syncBall()
+
+        state = [self.tick, self.time, self.dir, self.vel]
+        for robot in self.robots:
+            state += [robot.pos.x, robot.pos.y, robot.angle, robot.vel.size, robot.vel.dir]
+            for wheel in robot.wheels:
+                state += [wheel.vel, wheel.target]
+
+        ball = self.ball
+        state += [ball.pos.x, ball.pos.y, ball.vel.size, ball.vel.dir]
+
+        return array('d', state)
+
+    def restore(self, state):
+        ### Engine must have the same robots and wheels count as the one which made snapshot
+        self.tick = int(state[0])
+        self.time, self.dir, self.vel = state[1:4]
+
+        i = 4
+        for robot in self.robots:
+            robot.pos = Point(state[i], state[i + 1])
+            robot.angle = state[i + 2]
+            robot.vel = Vec(state[i + 3], state[i + 4])
+            i += 5
+
+            for wheel in robot.wheels:
+                wheel.vel, wheel.target = state[i], state[i + 1]
+                i += 2
+
+        self.ball.pos = Point(state[i], state[i + 1])
+        self.ball.vel = Vec(state[i + 2], state[i + 3])
+
+        self.freeBall = None
+        if self.eventDrivenBall:
+            self.planBall()
+
+    def fork(self, state=None):
+        ### Independent engine with the same parameters and state (or given snapshot)
+        engine = shallowCopy(self)
+        engine.robots = [shallowCopy(robot) for robot in self.robots]
+        for robot in engine.robots:
+            robot.wheels = [shallowCopy(wheel) for wheel in robot.wheels]
+        engine.ball = shallowCopy(self.ball)
+        engine.recorder = None
+        engine.controllers = None
+        engine.events = None
+        engine.history = None
+        engine.profiler = None
+        engine.broadPhase = SweepAndPrune()
+        for obj in engine.robots + [engine.ball]:
+            obj.AABB = AABB(Point(), Point())
+
+        engine.restore(self.snapshot() if state is None else state)
+
+        return engine
+
+    def getState(self):
+        self.syncBall()
+
+        return {
+            'robots': [{
+                'pos': list(robot.pos),
+                'angle': robot.angle,
+                'vel': [robot.vel.size, robot.vel.dir],
+                'wheels': [wheel.vel for wheel in robot.wheels]
+            } for robot in self.robots],
+            'ball': {
+                'pos': list(self.ball.pos),
+                'vel': [self.ball.vel.size, self.ball.vel.dir]
+            }
+        }
+
+def shallowCopy(obj):
+    ### Faster than copy.copy for plain objects
+    clone = object.__new__(obj.__class__)
+    clone.__dict__.update(obj.__dict__)
+
+    return clone
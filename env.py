@@ -0,0 +1,143 @@
+import numpy as np
+from batch import BatchEngine
+from field import Field
+
+def stateObservation(env, out=None):
+    ### Per robot x, y, cos and sin of angle, velocity and wheels velocities, then ball position and velocity.
+    ### Fills out in place, allocates it on the first call
+    batch = env.batch
+    robotSize = 6 + batch.wheelsCount
+    if out is None:
+        out = np.empty((batch.envsCount, batch.robotsCount * robotSize + 4), dtype=batch.robotPos.dtype)
+
+    robots = out[:, :batch.robotsCount * robotSize].reshape(batch.envsCount, batch.robotsCount, robotSize)
+    robots[..., 0:2] = batch.robotPos
+    np.cos(batch.robotAngle, out=robots[..., 2])
+    np.sin(batch.robotAngle, out=robots[..., 3])
+    robots[..., 4:6] = batch.robotVel
+    robots[..., 6:] = batch.wheelVel
+
+    out[:, -4:-2] = batch.ballPos
+    out[:, -2:] = batch.ballVel
+
+    return out
+
+def sensorObservation(sensors):
+    ### Observation made of sensors.Sensors readings of every robot instead of true state, e.g.
+    ### VectorEnv(64, observation=sensorObservation(Sensors(seed=0)))
+    def observation(env, out=None):
+        batch = env.batch
+        if out is None:
+            out = np.empty((batch.envsCount, batch.robotsCount * sensors.size), dtype=batch.robotPos.dtype)
+
+        readings = sensors.readWorld(batch)
+        robots = out.reshape(batch.envsCount, batch.robotsCount, sensors.size)
+        i = 0
+        for name, size in sensors.layout:
+            robots[..., i:i + size] = readings[name].reshape(batch.envsCount, batch.robotsCount, size)
+            i += size
+
+        return out
+
+    return observation
+
+def ballProgressReward(env, out=None):
+    ### Ball movement towards positive x goal during the last control period, goals give 1 or -1
+    if out is None:
+        out = np.empty(env.batch.envsCount, dtype=env.batch.robotPos.dtype)
+
+    np.multiply(env.batch.ballVel[:, 0], env.controlPeriod, out=out)
+    out += env.goals
+
+    return out
+
+def goalsOf(batch):
+    ### 1 for goal into positive x side, -1 for negative one, 0 otherwise, see Field.goal
+    x, y = batch.ballPos[:, 0], batch.ballPos[:, 1]
+    return np.sign(x) * ((np.abs(x) > Field.lineX) & (np.abs(y) < Field.goalWidth / 2))
+
+class VectorEnv:
+    def __init__(self, envsCount, robotsCount=1, action='move', observation=stateObservation, reward=ballProgressReward,
+                 dt=0.001, controlPeriod=0.016, maxTime=10, spawn=None, dtype=np.float32):
+        ### action is 'move' with (vel, dir, heading) per robot or 'wheels' with wheels targets per robot.
+        ### observation(env, out) and reward(env, out) fill preallocated arrays, see stateObservation.
+        ### spawn(env, envs) may change state of just reset environments, envs is boolean mask
+        if action not in ('move', 'wheels'):
+            raise ValueError("Unknown action type %s, use 'move' or 'wheels'" % action)
+
+        self.batch = BatchEngine(envsCount, robotsCount, dtype=dtype)
+        self.envsCount = envsCount
+        self.robotsCount = robotsCount
+        self.action = action
+        self.observation = observation
+        self.reward = reward
+        self.spawn = spawn
+
+        self.dt = dt
+        self.controlPeriod = controlPeriod
+        self.stepsPerControl = max(1, round(controlPeriod / dt))
+        self.maxTime = maxTime
+
+        self.time = np.zeros(envsCount)
+        self.goals = np.zeros(envsCount, dtype=dtype)
+        self.done = np.zeros(envsCount, dtype=bool)
+
+        ### Buffers are returned from every step, copy them to keep
+        self.observationBuffer = observation(self)
+        self.rewardBuffer = reward(self)
+
+    @property
+    def actionShape(self):
+        if self.action == 'move':
+            return (self.envsCount, self.robotsCount, 3)
+        return (self.envsCount, self.robotsCount, self.batch.wheelsCount)
+
+    @property
+    def observationShape(self):
+        return self.observationBuffer.shape
+
+    def reset(self, envs=None):
+        ### envs is a boolean mask of environments, all by default
+        if envs is None:
+            envs = np.ones(self.envsCount, dtype=bool)
+
+        self.batch.reset(envs)
+        self.time[envs] = 0
+        if self.spawn is not None:
+            self.spawn(self, envs)
+
+        return self.observation(self, self.observationBuffer)
+
+    def applyAction(self, action):
+        if self.action == 'wheels':
+            self.batch.setMotors(action)
+            return
+
+        for robot in range(self.robotsCount):
+            self.batch.move(robot, action[:, robot, 0], action[:, robot, 1], action[:, robot, 2])
+
+    def step(self, action):
+        ### Runs one control period for all environments, finished environments are reset.
+        ### Returns observation, reward and done arrays, observation of finished environments is after reset
+        action = np.asarray(action)
+        if action.shape != self.actionShape:
+            raise ValueError("Action shape is %s, expected %s" % (action.shape, self.actionShape))
+
+        self.applyAction(action)
+
+        ### Ball is behind the goal line only for a few steps before it bounces out, goals are checked after every step
+        self.goals[:] = 0
+        for i in range(self.stepsPerControl):
+            self.batch.step(self.dt)
+            np.copyto(self.goals, goalsOf(self.batch), where=self.goals == 0)
+        self.time += self.stepsPerControl * self.dt
+
+        np.not_equal(self.goals, 0, out=self.done)
+        self.done |= self.time >= self.maxTime
+
+        reward = self.reward(self, self.rewardBuffer)
+
+        if self.done.any():
+            self.reset(self.done)
+
+        return self.observation(self, self.observationBuffer), reward, self.done
@@ -0,0 +1,95 @@
+from array import array
+from collections import namedtuple
+
+### Event types
+CONTACT = 0
+WALL = 1
+POSSESSION = 2
+NAMES = ['contact', 'wall', 'possession']
+
+### Object ids: robots are indices in PhysEngine.robots, the ball goes after them, then Field.obstacles.
+### Walls and "nobody" (e.g. previous owner of the ball at start) are negative
+WALL_ID = -1
+NOBODY = -2
+
+### normal goes from a to b; impulse is velocity change of the lighter object, m/s
+Event = namedtuple('Event', ['tick', 'type', 'a', 'b', 'normalX', 'normalY', 'impulse'])
+
+class EventLog:
+    ### Ring buffer of physics events, nothing is allocated per event.
+    ### When more than capacity events are not read, the oldest ones are overwritten
+    def __init__(self, capacity=65536):
+        self.capacity = capacity
+
+        self.ticks = array('q', [0]) * capacity
+        self.types = array('b', [0]) * capacity
+        self.a = array('i', [0]) * capacity
+        self.b = array('i', [0]) * capacity
+        self.normalX = array('d', [0]) * capacity
+        self.normalY = array('d', [0]) * capacity
+        self.impulse = array('d', [0]) * capacity
+
+        ### Events ever emitted, position of the next one is count % capacity
+        self.count = 0
+
+    def emit(self, tick, type, a, b, normalX=0.0, normalY=0.0, impulse=0.0):
+        i = self.count % self.capacity
+        self.ticks[i] = tick
+        self.types[i] = type
+        self.a[i] = a
+        self.b[i] = b
+        self.normalX[i] = normalX
+        self.normalY[i] = normalY
+        self.impulse[i] = impulse
+        self.count += 1
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def get(self, number):
+        ### Event by its number since start, only the last capacity ones are kept
+        i = number % self.capacity
+        return Event(self.ticks[i], self.types[i], self.a[i], self.b[i], self.normalX[i], self.normalY[i], self.impulse[i])
+
+    def oldest(self):
+        return max(0, self.count - self.capacity)
+
+    def read(self, since):
+        ### Events with numbers from since, returns them and the number to continue from
+        start = max(since, self.oldest())
+        return [self.get(number) for number in range(start, self.count)], self.count
+
+    def query(self, type=None, object=None, fromTick=None, toTick=None):
+        ### Kept events filtered by type, participating object id and ticks range
+        result = []
+        for number in range(self.oldest(), self.count):
+            event = self.get(number)
+            if type is not None and event.type != type:
+                continue
+            if object is not None and object != event.a and object != event.b:
+                continue
+            if fromTick is not None and event.tick < fromTick:
+                continue
+            if toTick is not None and event.tick > toTick:
+                continue
+
+            result.append(event)
+
+        return result
+
+    def subscribe(self):
+        return Subscription(self)
+
+class Subscription:
+    ### Reader with own position in EventLog, drains new events in batches
+    def __init__(self, log):
+        self.log = log
+        self.position = log.count
+        self.lost = 0
+
+    def drain(self):
+        ### New events since the last drain, overwritten ones are counted in lost
+        self.lost += max(0, self.log.oldest() - self.position)
+        events, self.position = self.log.read(self.position)
+
+        return events
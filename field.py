@@ -1,19 +1,276 @@
+import hashlib
+import json
+import os
+import struct
+import tempfile
+from array import array
+from math import inf
 from physics import *
 
+### Precomputed geometry, see FieldSingleton.buildGrid
+GRID_MAGIC = b'SSFG'
+GRID_VERSION = 1
+### magic, version, columns, rows, cell size, x and y of the first cell corner
+GRID_HEADER = struct.Struct('<4sHIIddd')
+
+### Directory for grids of every field configuration
+CACHE_DIR = os.environ.get('SOCCER_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'soccer-simulator'))
+
+### Features of field geometry near a grid cell, bits of FieldGrid.mask: walls, then goal walls
+WALL_BITS = 4
+
+class FieldGrid:
+    ### Signed distance to walls and goals, angle of direction to the nearest of them, signed distance to painted lines
+    ### and mask of features near every cell. Flat arrays, row by row
+    def __init__(self, columns, rows, cell, x, y, distance, normal, line, mask):
+        self.columns = columns
+        self.rows = rows
+        self.cell = cell
+        self.x = x
+        self.y = y
+        self.scale = 1 / cell
+
+        self.distance = distance
+        self.normal = normal
+        self.line = line
+        self.mask = mask
+
+    def index(self, x, y):
+        ### Cell of point, None outside of grid
+        column = (x - self.x) * self.scale
+        row = (y - self.y) * self.scale
+        if 0 <= column < self.columns and 0 <= row < self.rows:
+            return int(row) * self.columns + int(column)
+
+        return None
+
+    def save(self, path):
+        with open(path, 'wb') as file:
+            file.write(GRID_HEADER.pack(GRID_MAGIC, GRID_VERSION, self.columns, self.rows, self.cell, self.x, self.y))
+            for data in (self.distance, self.normal, self.line, self.mask):
+                data.tofile(file)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as file:
+            header = file.read(GRID_HEADER.size)
+            if len(header) != GRID_HEADER.size:
+                raise ValueError("%s is truncated" % path)
+
+            magic, version, columns, rows, cell, x, y = GRID_HEADER.unpack(header)
+            if magic != GRID_MAGIC or version != GRID_VERSION:
+                raise ValueError("%s is not a field grid of version %d" % (path, GRID_VERSION))
+
+            arrays = []
+            for typecode in ('f', 'f', 'f', 'H'):
+                data = array(typecode)
+                data.fromfile(file, columns * rows)
+                arrays.append(data)
+
+        return cls(columns, rows, cell, x, y, *arrays)
+
 class FieldSingleton:
+    ### Objects up to this radius find touched walls in the grid, larger ones check all of them
+    REACH = 0.15
+
     def __init__(self):
-        self.size = Size(2.4, 1.8)
+        ### Static Circle and Rectangle objects added by user, walls and goals are field geometry
+        self.obstacles = []
+
+        ### Changed on every configure, so cached drawings can be rebuilt
+        self.version = 0
+
+        self.configure()
+
+    def configure(self, size=(2.4, 1.8), lineInset=0.12, lineWidth=0.02, goalWidth=0.6, goalDepth=0.074, goalWall=0.02,
+                  penaltyDepth=0.25, penaltyWidth=0.8, centerCircle=0.3, neutralSpot=0.45, cell=0.005):
+        ### RCJ field, meters: walls of size, white line inset from walls, goals behind the line between posts,
+        ### penalty areas in front of goals, center circle and neutral spots at neutralSpot from the line corners
+        self.config = dict(size=list(size), lineInset=lineInset, lineWidth=lineWidth, goalWidth=goalWidth, goalDepth=goalDepth,
+                           goalWall=goalWall, penaltyDepth=penaltyDepth, penaltyWidth=penaltyWidth, centerCircle=centerCircle,
+                           neutralSpot=neutralSpot, cell=cell)
+
+        self.size = Size(*size)
+        self.halfWidth, self.halfHeight = size[0] / 2, size[1] / 2
+        self.lineWidth = lineWidth
+        self.goalWidth = goalWidth
+        self.centerCircle = centerCircle
+
+        ### Goal lines are at x = +-lineX, side lines at y = +-lineY
+        self.lineX = size[0] / 2 - lineInset
+        self.lineY = size[1] / 2 - lineInset
+
+        ### Objects with x inside of this touch no goal, goals are behind goal lines
+        self.clearX = min(self.halfWidth, self.lineX)
+
+        ### Back and side walls of both goals, the front ends of side walls are posts
+        self.goalWalls = []
+        for side in (1, -1):
+            self.goalWalls.append(Rectangle(Size(goalWall, goalWidth + 2 * goalWall), pos=Point(side * (self.lineX + goalDepth + goalWall / 2), 0)))
+            for y in (1, -1):
+                self.goalWalls.append(Rectangle(Size(goalDepth, goalWall), pos=Point(side * (self.lineX + goalDepth / 2), y * (goalWidth + goalWall) / 2)))
+
+        ### Centers of painted lines as segments (x1, y1, x2, y2): border, then penalty areas
+        x, y = self.lineX, self.lineY
+        self.lines = [(-x, -y, x, -y), (x, -y, x, y), (x, y, -x, y), (-x, y, -x, -y)]
+        for side in (1, -1):
+            front = side * (x - penaltyDepth)
+            self.lines += [(side * x, -penaltyWidth / 2, front, -penaltyWidth / 2), (front, -penaltyWidth / 2, front, penaltyWidth / 2),
+                           (front, penaltyWidth / 2, side * x, penaltyWidth / 2)]
+
+        self.neutralSpots = [Point(0, 0)] + [Point(sx * (x - neutralSpot), sy * (y - neutralSpot)) for sx in (1, -1) for sy in (1, -1)]
+
+        self.grid = None
+        self.featureLists = {}
+        self.version += 1
+
+    @property
+    def key(self):
+        return hashlib.sha1(json.dumps(dict(self.config, version=GRID_VERSION), sort_keys=True).encode()).hexdigest()[:16]
+
+    def loadGrid(self):
+        ### Grid of this configuration from cache, built and saved on the first use
+        path = os.path.join(CACHE_DIR, 'field-%s.grid' % self.key)
+        try:
+            self.grid = FieldGrid.load(path)
+            return self.grid
+        except (OSError, ValueError, EOFError):
+            ### Missing, old or truncated file is built again
+            pass
+
+        self.grid = self.buildGrid()
+        try:
+            ### Workers of a pool may build the grid at the same time, each one writes own file and renames it
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            handle, temp = tempfile.mkstemp(suffix='.tmp', dir=CACHE_DIR)
+            os.close(handle)
+            try:
+                self.grid.save(temp)
+                os.replace(temp, path)
+            except OSError:
+                os.remove(temp)
+                raise
+        except OSError as e:
+            print("%s while saving field grid, it will be built again next time" % e)
+
+        return self.grid
+
+    def buildGrid(self):
+        ### Distances at cell centers; the grid covers walls with REACH margin, objects may overlap walls a bit
+        import numpy as np
+
+        cell = self.config['cell']
+        halfWidth, halfHeight = self.size.x / 2, self.size.y / 2
+        left, bottom = -halfWidth - self.REACH, -halfHeight - self.REACH
+        columns = int(np.ceil((self.size.x + 2 * self.REACH) / cell))
+        rows = int(np.ceil((self.size.y + 2 * self.REACH) / cell))
+        x, y = np.meshgrid(left + (np.arange(columns) + 0.5) * cell, bottom + (np.arange(rows) + 0.5) * cell)
+
+        ### Distance to every feature and direction to its nearest point, walls are half planes
+        distances = [halfWidth - x, halfHeight - y, halfWidth + x, halfHeight + y]
+        normals = [np.full_like(x, angle) for angle in (0, PI / 2, PI, PI * 3 / 2)]
+        for wall in self.goalWalls:
+            box = wall.AABB
+            nearX, nearY = np.clip(x, box.min.x, box.max.x), np.clip(y, box.min.y, box.max.y)
+            outside = np.hypot(nearX - x, nearY - y)
+            inside = np.minimum(np.minimum(x - box.min.x, box.max.x - x), np.minimum(y - box.min.y, box.max.y - y))
+            distances.append(np.where(outside > 0, outside, -inside))
+            normals.append(np.arctan2(nearY - y, nearX - x))
+
+        distances = np.stack(distances)
+        nearest = distances.argmin(axis=0)
+        distance = np.take_along_axis(distances, nearest[None], axis=0)[0]
+        normal = np.take_along_axis(np.stack(normals), nearest[None], axis=0)[0]
+
+        ### Bit of every feature which an object of REACH radius anywhere in the cell may touch
+        near = distances < self.REACH + cell * 0.71
+        mask = (near * (1 << np.arange(len(distances)))[:, None, None]).sum(axis=0)
+
+        ### Painted lines, negative on paint
+        lineDistance = np.full_like(x, np.inf)
+        for x1, y1, x2, y2 in self.lines:
+            dx, dy = x2 - x1, y2 - y1
+            t = np.clip(((x - x1) * dx + (y - y1) * dy) / (dx * dx + dy * dy), 0, 1)
+            lineDistance = np.minimum(lineDistance, np.hypot(x - x1 - t * dx, y - y1 - t * dy))
+        lineDistance = np.minimum(lineDistance, np.abs(np.hypot(x, y) - self.centerCircle))
+        lineDistance -= self.lineWidth / 2
+
+        return FieldGrid(columns, rows, cell, left, bottom, array('f', distance.astype(np.float32).tobytes()),
+                         array('f', normal.astype(np.float32).tobytes()), array('f', lineDistance.astype(np.float32).tobytes()),
+                         array('H', mask.astype(np.uint16).tobytes()))
+
+    def features(self, mask):
+        ### Exact checks of features in mask, cached as there are only a few different masks
+        if mask not in self.featureLists:
+            self.featureLists[mask] = ([i for i in range(WALL_BITS) if mask & (1 << i)],
+                                       [wall for i, wall in enumerate(self.goalWalls) if mask & (1 << (WALL_BITS + i))])
+
+        return self.featureLists[mask]
 
     def touch(self, obj):
-        intersectionsList = (obj.pos + obj.r > self.size / 2) + (obj.pos - obj.r < -self.size / 2)
-        angles = [0, PI / 2, PI, PI * 3 / 2]
-        if any(intersectionsList):
-            res = []
-            for i in range(4):
-                if intersectionsList[i]:
-                    res.append(angles[i])
-            return True, res
-        else:
+        ### Touched walls and goals as directions from the object to them
+        x, y, r = obj.pos.x, obj.pos.y, obj.r
+
+        ### Fast path, most of the time objects are far from walls and in front of goal lines
+        if -self.clearX < x - r and x + r < self.clearX and -self.halfHeight < y - r and y + r < self.halfHeight:
             return False, None
 
+        ### Near walls and goals only features found in the grid cell are checked
+        grid = self.grid or self.loadGrid()
+        column = (x - grid.x) * grid.scale
+        row = (y - grid.y) * grid.scale
+        if r <= self.REACH and 0 <= column < grid.columns and 0 <= row < grid.rows:
+            mask = grid.mask[int(row) * grid.columns + int(column)]
+            if not mask:
+                return False, None
+        else:
+            mask = (1 << (WALL_BITS + len(self.goalWalls))) - 1
+
+        walls, goalWalls = self.featureLists.get(mask) or self.features(mask)
+        halfWidth, halfHeight = self.halfWidth, self.halfHeight
+        res = []
+        for i in walls:
+            if i == 0 and x + r > halfWidth:
+                res.append(0)
+            elif i == 1 and y + r > halfHeight:
+                res.append(PI / 2)
+            elif i == 2 and x - r < -halfWidth:
+                res.append(PI)
+            elif i == 3 and y - r < -halfHeight:
+                res.append(PI * 3 / 2)
+
+        for wall in goalWalls:
+            collision = wall.collide(obj)
+            if collision is not None:
+                res.append(angleCheck(collision.dir + PI))
+
+        if res:
+            return True, res
+
+        return False, None
+
+    def distance(self, point):
+        ### Signed distance to walls and goals and direction to the nearest of them, from the grid
+        grid = self.grid or self.loadGrid()
+        index = grid.index(point.x, point.y)
+        if index is None:
+            return -inf, 0
+
+        return grid.distance[index], grid.normal[index]
+
+    def onLine(self, point):
+        ### True on painted lines, from the grid
+        grid = self.grid or self.loadGrid()
+        index = grid.index(point.x, point.y)
+
+        return index is not None and grid.line[index] < 0
+
+    def goal(self, ball):
+        ### 1 if ball center is behind the goal line between posts at positive x side, -1 at negative one, 0 otherwise.
+        ### Goals are only a bit deeper than the ball, so the whole ball is behind the line for too short to be checked
+        if abs(ball.pos.x) <= self.lineX or abs(ball.pos.y) >= self.goalWidth / 2:
+            return 0
+
+        return 1 if ball.pos.x > 0 else -1
+
 Field = FieldSingleton()
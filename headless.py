@@ -0,0 +1,100 @@
+import sys
+from time import perf_counter
+from engine import PhysEngine
+from events import EventLog, NAMES
+
+def simulate(engine, duration, dt=0.001, controlPeriod=0.016, timeLimit=None, onStep=None):
+    ### Steps engine for a fixed amount of simulated time, control runs every controlPeriod.
+    ### onStep(i) is called after every step, e.g. to drain events without breaking control cadence into chunks
+    steps = round(duration / dt)
+    stepsPerControl = max(1, round(controlPeriod / dt))
+    deadline = None if timeLimit is None else perf_counter() + timeLimit
+
+    for i in range(steps):
+        if i % stepsPerControl == 0:
+            if deadline is not None and perf_counter() > deadline:
+                raise TimeoutError("simulation took more than %s s" % timeLimit)
+
+            engine.control()
+
+        engine.step(dt)
+
+        if onStep is not None:
+            onStep(i)
+
+    return steps
+
+def main(argv=None):
+    ### Workers import simulate only, command line modules are imported here
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Run soccer simulation without GUI")
+    parser.add_argument("-t", "--time", type=float, default=60, help="simulated time, seconds")
+    parser.add_argument("--dt", type=float, default=0.001, help="physics step, seconds")
+    parser.add_argument("-r", "--robots", type=int, default=1, help="robots count")
+    parser.add_argument("--event-ball", action="store_true", help="move free ball by closed form between contacts")
+    parser.add_argument("--continuous", action="store_true", help="continuous collisions, allows larger --dt")
+    parser.add_argument("-c", "--controller", action="append", default=[], metavar="MODULE:FUNCTION",
+                        help="team controller, once per team; robots are split between teams evenly")
+    parser.add_argument("--sensors", action="store_true", help="controllers get IR ring, line sensors and compass readings")
+    parser.add_argument("--events", default=None, help="file for contacts, wall hits and possession changes, json lines")
+    parser.add_argument("-o", "--output", default=None, help="file for final state, stdout by default")
+    args = parser.parse_args(argv)
+
+    engine = PhysEngine(robotsCount=args.robots, eventDrivenBall=args.event_ball, continuous=args.continuous)
+    if args.controller:
+        from controllers import ControllerHost
+
+        for i, robot in enumerate(engine.robots):
+            robot.team = i * len(args.controller) // len(engine.robots)
+        sensors = None
+        if args.sensors:
+            from sensors import Sensors
+
+            sensors = Sensors()
+        engine.controllers = ControllerHost(engine, args.controller, sensors=sensors)
+    if args.events:
+        engine.events = EventLog()
+        subscription = engine.events.subscribe()
+
+    ts = perf_counter()
+    try:
+        if args.events:
+            ### Drain events every simulated second and at the end, ring buffer keeps only the latest ones
+            stepsPerDrain = max(1, round(1 / args.dt))
+
+            def drain(i):
+                if (i + 1) % stepsPerDrain == 0:
+                    for event in subscription.drain():
+                        file.write(json.dumps(dict(event._asdict(), type=NAMES[event.type])) + "\n")
+
+            with open(args.events, "w") as file:
+                steps = simulate(engine, args.time, args.dt, onStep=drain)
+                drain(-1)
+
+            if subscription.lost:
+                print("%d events were lost" % subscription.lost, file=sys.stderr)
+        else:
+            steps = simulate(engine, args.time, args.dt)
+    finally:
+        if engine.controllers is not None:
+            engine.controllers.close()
+    elapsed = perf_counter() - ts
+
+    if engine.controllers is not None:
+        for team in engine.controllers.teams:
+            print("team %d (%s): %d missed deadlines" % (team.team, team.spec, team.missed), file=sys.stderr)
+
+    print("%d steps in %.3f s: %.0f steps/s, %.1fx real time" % (steps, elapsed, steps / elapsed, args.time / elapsed), file=sys.stderr)
+
+    state = engine.getState()
+    if args.output is None:
+        json.dump(state, sys.stdout, indent=4)
+        print()
+    else:
+        with open(args.output, "w") as file:
+            json.dump(state, file, indent=4)
+
+if __name__ == '__main__':
+    main()
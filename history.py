@@ -0,0 +1,153 @@
+from array import array
+from collections import deque
+
+class Segment:
+    ### Keyframe and changes of wheels targets and mouse target after it until the next keyframe
+    def __init__(self, keyframe):
+        self.keyframe = keyframe
+        self.tick = int(keyframe[0])
+        self.lastTick = self.tick
+
+        self.ticks = array('q')
+        self.robots = array('h')
+        self.targets = array('d')
+
+        ### PhysEngine.dir and vel
+        self.mouseTicks = array('q')
+        self.mouse = array('d')
+
+    def bytes(self):
+        return sum(len(data) * data.itemsize for data in (self.keyframe, self.ticks, self.robots, self.targets, self.mouseTicks, self.mouse))
+
+class History:
+    ### Past of PhysEngine within memory limit. Physics is deterministic, so only keyframes (snapshots) and
+    ### wheels targets set by control are stored; any tick is rebuilt by stepping from the nearest keyframe.
+    ### The oldest keyframes are dropped first. Engine must run with fixed step
+    def __init__(self, engine, memoryLimit=16 * 2 ** 20, keyframePeriod=0.5):
+        if engine.fixedStep is None:
+            raise ValueError("History needs engine with fixedStep")
+
+        self.engine = engine
+        self.dt = engine.fixedStep
+        self.memoryLimit = memoryLimit
+        self.keyframeTicks = max(1, round(keyframePeriod / self.dt))
+
+        self.segments = deque()
+        self.bytes = 0
+        self.lastTargets = []
+        self.lastMouse = None
+
+        ### Engine used to rebuild past states, kept to continue from it when scrubbing forward
+        self.cursor = None
+
+    def record(self, engine):
+        ### Called by engine after every control
+        targets = [array('d', [wheel.target for wheel in robot.wheels]) for robot in engine.robots]
+
+        if not self.segments or engine.tick - self.segments[-1].tick >= self.keyframeTicks:
+            self.segments.append(Segment(engine.snapshot()))
+            self.bytes += self.segments[-1].bytes()
+            self.lastTargets = targets
+            self.lastMouse = (engine.dir, engine.vel)
+            self.evict()
+            return
+
+        segment = self.segments[-1]
+        segment.lastTick = engine.tick
+        for i, (current, last) in enumerate(zip(targets, self.lastTargets)):
+            if current != last:
+                segment.ticks.append(engine.tick)
+                segment.robots.append(i)
+                segment.targets.extend(current)
+                self.bytes += 8 + 2 + len(current) * 8
+
+        self.lastTargets = targets
+
+        if (engine.dir, engine.vel) != self.lastMouse:
+            segment.mouseTicks.append(engine.tick)
+            segment.mouse.extend((engine.dir, engine.vel))
+            self.bytes += 8 + 2 * 8
+            self.lastMouse = (engine.dir, engine.vel)
+
+    def evict(self):
+        while self.bytes > self.memoryLimit and len(self.segments) > 1:
+            self.bytes -= self.segments.popleft().bytes()
+
+    @property
+    def firstTick(self):
+        return self.segments[0].tick if self.segments else self.engine.tick
+
+    @property
+    def lastTick(self):
+        ### The last recorded control, later ticks are rebuilt with its inputs
+        return self.segments[-1].lastTick if self.segments else self.engine.tick
+
+    def segmentAt(self, tick):
+        for segment in reversed(self.segments):
+            if segment.tick <= tick:
+                return segment
+
+        raise IndexError("Tick %d is not in history, the oldest one is %d" % (tick, self.firstTick))
+
+    def stateAt(self, tick):
+        ### Snapshot of engine at tick, rebuilt from the nearest keyframe
+        segment = self.segmentAt(tick)
+
+        cursor = self.cursor
+        if cursor is None or cursor.segment is not segment or cursor.tick > tick:
+            cursor = self.engine.fork(segment.keyframe)
+            cursor.segment = segment
+            cursor.delta = 0
+            cursor.mouseDelta = 0
+            self.cursor = cursor
+
+        wheelsCount = len(cursor.robots[0].wheels)
+        while True:
+            ### Apply targets set at current tick, then step
+            while cursor.delta < len(segment.ticks) and segment.ticks[cursor.delta] <= cursor.tick:
+                robot = cursor.robots[segment.robots[cursor.delta]]
+                start = cursor.delta * wheelsCount
+                for wheel, target in zip(robot.wheels, segment.targets[start:start + wheelsCount]):
+                    wheel.target = target
+                cursor.delta += 1
+
+            while cursor.mouseDelta < len(segment.mouseTicks) and segment.mouseTicks[cursor.mouseDelta] <= cursor.tick:
+                cursor.dir, cursor.vel = segment.mouse[2 * cursor.mouseDelta:2 * cursor.mouseDelta + 2]
+                cursor.mouseDelta += 1
+
+            if cursor.tick >= tick:
+                break
+
+            cursor.step(self.dt)
+
+        return cursor.snapshot()
+
+    def truncate(self, tick):
+        ### Forgets everything after tick, e.g. when simulation continues from a past state
+        if not self.segments:
+            return
+
+        ### Inputs at tick, engine itself may already have new ones
+        self.stateAt(tick)
+        self.lastTargets = [array('d', [wheel.target for wheel in robot.wheels]) for robot in self.cursor.robots]
+        self.lastMouse = (self.cursor.dir, self.cursor.vel)
+        self.cursor = None
+
+        while self.segments[-1].tick > tick:
+            self.bytes -= self.segments.pop().bytes()
+
+        segment = self.segments[-1]
+        wheelsCount = len(self.engine.robots[0].wheels)
+
+        keep = sum(1 for t in segment.ticks if t <= tick)
+        self.bytes -= (len(segment.ticks) - keep) * (8 + 2 + wheelsCount * 8)
+        del segment.ticks[keep:]
+        del segment.robots[keep:]
+        del segment.targets[keep * wheelsCount:]
+
+        keep = sum(1 for t in segment.mouseTicks if t <= tick)
+        self.bytes -= (len(segment.mouseTicks) - keep) * (8 + 2 * 8)
+        del segment.mouseTicks[keep:]
+        del segment.mouse[2 * keep:]
+
+        segment.lastTick = min(segment.lastTick, tick)
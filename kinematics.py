@@ -0,0 +1,39 @@
+from functools import lru_cache
+from math import sin, cos
+from operator import mul
+
+def matVec(matrix, vector):
+    return [sum(map(mul, row, vector)) for row in matrix]
+
+class Kinematics:
+    ### Wheels matrices of omni-wheel robot, depend only on wheels angles
+    def __init__(self, angles):
+        self.angles = tuple(angles)
+        self.count = len(self.angles)
+
+        directions = [(cos(a), sin(a)) for a in self.angles]
+
+        ### Robot velocity (not normalized, as in Robot.calcVel) from wheels speeds: whole = F * v
+        F = [[c for c, s in directions], [s for c, s in directions]]
+
+        ### Wheels slip: dV = (F^T * F - I) * v and velocity lost on it: delta = F * dV = Q * v
+        P = [[ci * cj + si * sj - (i == j) for j, (cj, sj) in enumerate(directions)] for i, (ci, si) in enumerate(directions)]
+        Q = [[sum(F[row][k] * P[k][j] for k in range(self.count)) for j in range(self.count)] for row in range(2)]
+
+        ### Forward kinematics: [wholeX, wholeY, deltaX, deltaY] = forward * v
+        self.forward = tuple(tuple(row) for row in F + Q)
+
+        ### Inverse kinematics for Robot.move: v = inverse * [vel * cos(dir), vel * sin(dir)]
+        self.inverse = tuple((s, c) for c, s in directions)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get(angles):
+        ### Shared by all robots with the same wheels layout
+        return Kinematics(angles)
+
+    def velocity(self, wheelsVel):
+        return matVec(self.forward, wheelsVel)
+
+    def wheels(self, velX, velY):
+        return [a * velX + b * velY for a, b in self.inverse]
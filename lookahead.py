@@ -0,0 +1,18 @@
+import numpy as np
+from batch import BatchEngine
+
+def rollout(engine, commands, horizon=0.5, robot=0, dt=0.001, controlPeriod=0.016, dtype=np.float64):
+    ### Simulates all candidate commands for robot-th robot from current engine state at once.
+    ### commands is array of (vel, dir, heading) rows, as for Robot.move; other robots keep wheels targets.
+    ### Returns BatchEngine with one environment per command, e.g. batch.ballPos after horizon seconds
+    commands = np.asarray(commands, dtype=float)
+    batch = BatchEngine.fromEngine(engine, len(commands), dtype)
+
+    stepsPerControl = max(1, round(controlPeriod / dt))
+    for i in range(round(horizon / dt)):
+        if i % stepsPerControl == 0:
+            batch.move(robot, commands[:, 0], commands[:, 1], commands[:, 2])
+
+        batch.step(dt)
+
+    return batch
@@ -1,8 +1,10 @@
-from PyQt5 import QtWidgets
-from PyQt5.QtWidgets import QMainWindow, QApplication, QWidget
-from PyQt5.QtGui import QPainter, QColor, QBrush
-from design import Ui_MainWindow
+from time import perf_counter
+startTime = perf_counter()
+
+import argparse
 import sys
+from PyQt5.QtWidgets import QMainWindow, QApplication
+from design import Ui_MainWindow
 
 class App(QMainWindow):
     def __init__(self):
@@ -11,8 +13,60 @@ class App(QMainWindow):
         self.ui.setupUi(self)
 
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="RCJ soccer simulator")
+    parser.add_argument("--replay", help="play recorded match instead of simulation")
+    parser.add_argument("--record", help="record simulated match to file")
+    parser.add_argument("--worker", action="store_true", help="run physics in separate process")
+    parser.add_argument("--controller", action="append", default=[], metavar="MODULE:FUNCTION",
+                        help="team controller instead of mouse, once per team")
+    parser.add_argument("--sensors", action="store_true", help="controllers get IR ring, line sensors and compass readings")
+    parser.add_argument("--startup-time", action="store_true", help="print time of imports, window creation and first frame, then exit")
+    args, qtArgs = parser.parse_known_args()
+
+    importTime = perf_counter()
+    app = QApplication(sys.argv[:1] + qtArgs)
     window = App()
+    windowTime = perf_counter()
+
+    ### Modules of optional features are imported only when they are used
+    canvas = window.ui.canvasArea
+    if args.replay:
+        canvas.loadReplay(args.replay)
+    elif args.worker:
+        canvas.useWorkerProcess()
+    elif args.record:
+        from recorder import Recorder
+
+        canvas.pEngine.recorder = Recorder(args.record, canvas.pEngine)
+
+    if args.controller and not (args.replay or args.worker):
+        from controllers import ControllerHost
+
+        engine = canvas.pEngine
+        for i, robot in enumerate(engine.robots):
+            robot.team = i * len(args.controller) // len(engine.robots)
+        sensors = None
+        if args.sensors:
+            from sensors import Sensors
+
+            sensors = Sensors()
+        engine.controllers = ControllerHost(engine, args.controller, sensors=sensors)
+
     window.show()
 
-    sys.exit(app.exec())
+    if args.startup_time:
+        while canvas.firstFrame is None:
+            app.processEvents()
+
+        print("imports %.1f ms, window %.1f ms, first frame %.1f ms, total %.1f ms" % ((importTime - startTime) * 1e3,
+              (windowTime - importTime) * 1e3, (canvas.firstFrame - windowTime) * 1e3, (canvas.firstFrame - startTime) * 1e3))
+        code = 0
+    else:
+        code = app.exec()
+
+    if getattr(canvas.pEngine, 'controllers', None) is not None:
+        canvas.pEngine.controllers.close()
+    if getattr(canvas.pEngine, 'recorder', None) is not None:
+        canvas.pEngine.recorder.close()
+
+    sys.exit(code)
@@ -1,5 +1,4 @@
 import csv
-from PyQt5.QtGui import QColor
 
 White = 0
 Pink = 1
@@ -11,14 +10,22 @@ Red = 6
 
 class SingletonPalette:
     def __init__(self):
-        self.load()
+        ### Changed on every palette change, so cached drawings can be rebuilt
+        self.version = 0
+
+        ### Colors are made on the first use, so importing palette does not load Qt
+        self.data = None
 
     def clear(self):
         self.data = []
+        self.version += 1
 
     def add(self, value):
+        from PyQt5.QtGui import QColor
+
         self.data.append(QColor(0, 0, 0))
         self.data[-1].setNamedColor(value)
+        self.version += 1
 
     def load(self):
         ### Trying to read configuration file
@@ -36,6 +43,9 @@ class SingletonPalette:
                 self.add(val)
 
     def __call__(self, color):
+        if self.data is None:
+            self.load()
+
         return self.data[color]
 
 Palette = SingletonPalette()
@@ -52,30 +52,62 @@ def getMirrorProj(vec, angle):
     return Vec(vec.size, angleCheck(angle + (angle - vec.dir)))
 
 def vec2point(vec):
-    return Point(cos(vec.dir), sin(vec.dir)) * vec.size
+    return Point(vec.x, vec.y)
 
 def point2vec(point):
     return Vec(point.size(), atan2(point.y, point.x))
 
 class Point:
+    __slots__ = ('x', 'y')
+
     def __init__(self, x=0, y=0):
         self.x = x
         self.y = y
 
     def fSize(self):
-        return self.x ** 2 + self.y ** 2
+        return self.x * self.x + self.y * self.y
 
     def size(self):
-        return sqrt(self.x ** 2 + self.y ** 2)
+        return sqrt(self.x * self.x + self.y * self.y)
+
+    def addScaled(self, other, k):
+        ### In place self += other * k for Point or Vec without temporary objects
+        self.x += other.x * k
+        self.y += other.y * k
+
+        return self
 
     def __iadd__(self, other):
-        if isinstance(other, Point):
+        if isinstance(other, (Point, Vec)):
             self.x += other.x
             self.y += other.y
 
             return self
-        elif isinstance(other, Vec):
-            self += vec2point(other)
+        else:
+            raise TypeError
+
+    def __isub__(self, other):
+        if isinstance(other, (Point, Vec)):
+            self.x -= other.x
+            self.y -= other.y
+
+            return self
+        else:
+            raise TypeError
+
+    def __imul__(self, other):
+        if isinstance(other, (int, float)):
+            self.x *= other
+            self.y *= other
+
+            return self
+        else:
+            raise TypeError
+
+    def __itruediv__(self, other):
+        if isinstance(other, (int, float)):
+            self.x /= other
+            self.y /= other
 
             return self
         else:
@@ -90,7 +122,12 @@ class Point:
             raise TypeError
 
     def __sub__(self, other):
-        return self + (-other)
+        if isinstance(other, Point):
+            return Point(self.x - other.x, self.y - other.y)
+        elif isinstance(other, (int, float)):
+            return Point(self.x - other, self.y - other)
+        else:
+            raise TypeError
 
     def __mul__(self, other):
         if isinstance(other, (int, float)):
@@ -124,7 +161,8 @@ class Point:
             raise TypeError
 
     def __iter__(self):
-        yield from [self.x, self.y]
+        yield self.x
+        yield self.y
 
     def __setitem__(self, index, value):
         if index == 0:
@@ -146,23 +184,81 @@ class Point:
         return f"Point({self.x}, {self.y})"
 
 class Vec:
+    ### Polar vector, cartesian form is calculated on demand and cached until size or dir change
+    __slots__ = ('_size', '_dir', '_x', '_y')
+
     def __init__(self, size=1, dir=0):
-        self.size = size
-        self.dir = dir
+        self._size = size
+        self._dir = dir
+        self._x = None
+
+    @classmethod
+    def fromXY(cls, x, y):
+        vec = cls(sqrt(x * x + y * y), atan2(y, x))
+        vec._x = x
+        vec._y = y
+
+        return vec
+
+    @property
+    def size(self):
+        return self._size
+
+    @size.setter
+    def size(self, value):
+        self._size = value
+        self._x = None
+
+    @property
+    def dir(self):
+        return self._dir
+
+    @dir.setter
+    def dir(self, value):
+        self._dir = value
+        self._x = None
+
+    def cache(self):
+        self._x = cos(self._dir) * self._size
+        self._y = sin(self._dir) * self._size
+
+    @property
+    def x(self):
+        if self._x is None:
+            self.cache()
+
+        return self._x
+
+    @property
+    def y(self):
+        if self._x is None:
+            self.cache()
+
+        return self._y
 
     def __mul__(self, other):
-        return Vec(self.size * other, self.dir)
+        return Vec(self._size * other, self._dir)
+
+    def __imul__(self, other):
+        self._size *= other
+        if self._x is not None:
+            self._x *= other
+            self._y *= other
+
+        return self
 
     def __sub__(self, other):
-        return point2vec(vec2point(self) - vec2point(other))
+        return Vec.fromXY(self.x - other.x, self.y - other.y)
 
     def __add__(self, other):
-        return point2vec(vec2point(self) + vec2point(other))
+        return Vec.fromXY(self.x + other.x, self.y + other.y)
 
     def __str__(self):
         return f"Vector({self.size}, {self.dir})"
 
 class Size(Point):
+    __slots__ = ()
+
     @property
     def width(self):
         return self.x
@@ -173,11 +269,12 @@ class Size(Point):
 
 class Collision:
     def __init__(self, penetration=None, dir=None):
+        ### Depth of overlap and direction from the first object to the second one
         self.penetration = penetration
         self.dir = dir
 
     def __enter__(self):
-        assert self.penetration == None or self.dir == None, "Objects are not colliding"
+        assert self.penetration != None and self.dir != None, "Objects are not colliding"
 
         return self
 
@@ -186,9 +283,9 @@ class Collision:
         pass
 
 class AABB:
-    def __init__(self, min=Point(), max=Point()):
-        self.min = min
-        self.max = max
+    def __init__(self, min=None, max=None):
+        self.min = Point() if min is None else min
+        self.max = Point() if max is None else max
 
     def isColliding(self, other):
         if self.max.x < other.min.x or self.min.x > other.max.x or self.max.y < other.min.y or self.min.y > other.max.y:
@@ -210,11 +307,11 @@ class AABB:
             self.max = max
 
 class Object:
-    def __init__(self, mass=0, pos=0, vel=0):
+    def __init__(self, mass=0, pos=None, vel=None):
         self.setMass(mass)
 
-        self.pos = pos
-        self.vel = vel
+        self.pos = Point() if pos is None else pos
+        self.vel = Vec(0, 0) if vel is None else vel
 
         self.AABB = AABB()
 
@@ -230,37 +327,66 @@ class Object:
         else:
             self.iMass = 1 / mass
 
+    def updateAABB(self):
+        pass
+
     def collide(self, other):
-        return False
+        return None
 
 class Circle(Object):
     def __init__(self, r=1, *args, **kwargs):
-        super(Object, self).__init__(*args, **kwargs)
+        super(Circle, self).__init__(*args, **kwargs)
 
         self.r = r
-        self.AABB.update(self.pos - r, self.pos + r)
+        self.updateAABB()
+
+    def updateAABB(self):
+        ### In place, bounding boxes of moving objects are updated every step
+        self.AABB.min.x = self.pos.x - self.r
+        self.AABB.min.y = self.pos.y - self.r
+        self.AABB.max.x = self.pos.x + self.r
+        self.AABB.max.y = self.pos.y + self.r
 
     def consist(self, point):
         if not self.AABB.consist(point):
             return False
 
-        return (point - pos).fSize() < (self.r ** 2)
+        return (point - self.pos).fSize() < (self.r ** 2)
 
     def isColliding(self, other, checkAABB=True):
         ### Check bounding boxes colliding
         if checkAABB and not self.AABB.isColliding(other.AABB):
             return False
 
+        return self.collide(other) is not None
+
+    def collide(self, other):
         if isinstance(other, Rectangle):
-            return any([self.consist(x) for x in other.vertices])
-        else:
-            return (self.pos - other.pos).fSize() < (self.other.r + self.r) ** 2
+            collision = other.collide(self)
+            if collision is not None:
+                collision.dir = angleCheck(collision.dir + PI)
+            return collision
+
+        dx = other.pos.x - self.pos.x
+        dy = other.pos.y - self.pos.y
+        distance = sqrt(dx * dx + dy * dy)
+        if distance >= self.r + other.r:
+            return None
+
+        return Collision(self.r + other.r - distance, atan2(dy, dx))
 
-def Rectangle(Object):
-    def __init__(self, size=Size(), *args, **kwargs):
-        super(Object, self).__init__(*args, **kwargs)
+class Rectangle(Object):
+    def __init__(self, size=None, *args, **kwargs):
+        super(Rectangle, self).__init__(*args, **kwargs)
 
-        self.AABB.update(self.pos - size / 2, self.pos + size / 2)
+        self.size = Size() if size is None else size
+        self.updateAABB()
+
+    def updateAABB(self):
+        self.AABB.min.x = self.pos.x - self.size.x / 2
+        self.AABB.min.y = self.pos.y - self.size.y / 2
+        self.AABB.max.x = self.pos.x + self.size.x / 2
+        self.AABB.max.y = self.pos.y + self.size.y / 2
 
     @property
     def vertices(self):
@@ -279,4 +405,26 @@ def Rectangle(Object):
             return self.AABB.isColliding(other.AABB)
 
         elif isinstance(other, Circle):
-            return other.isColliding(self, checkAABB=False)
+            return other.isColliding(self, checkAABB=checkAABB)
+
+    def collide(self, other):
+        ### Only circles, direction is from rectangle to circle
+        box = self.AABB
+        x, y = other.pos.x, other.pos.y
+
+        ### The nearest point of rectangle
+        nearX = min(max(x, box.min.x), box.max.x)
+        nearY = min(max(y, box.min.y), box.max.y)
+        dx, dy = x - nearX, y - nearY
+
+        if dx == 0 and dy == 0:
+            ### Center is inside, go out through the nearest side
+            exits = [(x - box.min.x, PI), (box.max.x - x, 0), (y - box.min.y, PI * 3 / 2), (box.max.y - y, PI / 2)]
+            depth, dir = min(exits)
+            return Collision(depth + other.r, dir)
+
+        distance = sqrt(dx * dx + dy * dy)
+        if distance >= other.r:
+            return None
+
+        return Collision(other.r - distance, atan2(dy, dx))
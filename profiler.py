@@ -0,0 +1,51 @@
+import json
+
+### Phases of PhysEngine.step, see PhysEngine.stepProfiled
+PHASES = ['kinematics', 'wallContact', 'contacts', 'integration', 'wheels', 'ball']
+
+class Profiler:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        ### Nanoseconds and calls count of every phase
+        self.times = dict.fromkeys(PHASES, 0)
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.steps = 0
+
+    def add(self, phase, ns):
+        self.times[phase] += ns
+        self.calls[phase] += 1
+
+    def toDict(self):
+        steps = max(self.steps, 1)
+        return {
+            'steps': self.steps,
+            'phases': {phase: {
+                'time': self.times[phase] / 1e9,
+                'calls': self.calls[phase],
+                'perStep': self.times[phase] / 1e3 / steps
+            } for phase in PHASES}
+        }
+
+    def toJSON(self, path):
+        with open(path, 'w') as file:
+            json.dump(self.toDict(), file, indent=4)
+
+    def toFolded(self, path):
+        ### Collapsed stacks format of flamegraph.pl and speedscope, values are microseconds
+        with open(path, 'w') as file:
+            for phase in PHASES:
+                stack = 'PhysEngine.step;' + phase if phase in ('contacts', 'ball') else 'PhysEngine.step;robots;' + phase
+                file.write("%s %d\n" % (stack, self.times[phase] // 1000))
+
+    def summary(self):
+        steps = max(self.steps, 1)
+        total = sum(self.times.values()) or 1
+
+        lines = ["%d steps, %.2f us per step" % (self.steps, total / 1e3 / steps)]
+        for phase in PHASES:
+            lines.append("%-12s %8.2f us/step %5.1f%%" % (phase, self.times[phase] / 1e3 / steps, 100 * self.times[phase] / total))
+
+        return '\n'.join(lines)
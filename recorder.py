@@ -0,0 +1,141 @@
+import mmap
+import os
+import struct
+from time import perf_counter
+from physics import *
+from robot import Robot, Ball
+
+MAGIC = b'SSRC'
+VERSION = 1
+
+### magic, version, robots count, wheels count, physics step
+HEADER = struct.Struct('<4sHHHd')
+
+def recordStruct(robotsCount, wheelsCount):
+    ### tick, then x, y, angle, velX, velY and wheels speeds of every robot, then ball x, y, velX, velY
+    return struct.Struct('<I' + ('5f' + 'f' * wheelsCount) * robotsCount + '4f')
+
+class Recorder:
+    ### Appends state of every-th step to binary file with fixed size records, 100 records per second by default
+    def __init__(self, path, engine, dt=0.001, every=10):
+        self.robotsCount = len(engine.robots)
+        self.wheelsCount = len(engine.robots[0].wheels)
+        self.record_ = recordStruct(self.robotsCount, self.wheelsCount)
+        self.every = every
+        self.count = 1
+
+        self.file = open(path, 'wb', buffering=1 << 20)
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.robotsCount, self.wheelsCount, dt * every))
+
+    def record(self, engine):
+        self.count -= 1
+        if self.count > 0:
+            return
+        self.count = self.every
+
+        engine.syncBall()
+
+        values = [engine.tick]
+        extend = values.extend
+        for robot in engine.robots:
+            pos, vel = robot.pos, robot.vel
+            extend((pos.x, pos.y, robot.angle, vel.x, vel.y))
+            extend([wheel.vel for wheel in robot.wheels])
+
+        ball = engine.ball
+        extend((ball.pos.x, ball.pos.y, ball.vel.x, ball.vel.y))
+
+        self.file.write(self.record_.pack(*values))
+
+    def close(self):
+        self.file.close()
+
+class Replay:
+    ### Memory mapped recording, any record is read in O(1)
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        if os.fstat(self.file.fileno()).st_size < HEADER.size:
+            self.file.close()
+            raise ValueError("%s is not a recording of version %d" % (path, VERSION))
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.robotsCount, self.wheelsCount, self.dt = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("%s is not a recording of version %d" % (path, VERSION))
+
+        self.record = recordStruct(self.robotsCount, self.wheelsCount)
+
+        ### Recording of a match which was closed before the first record
+        if not len(self):
+            self.close()
+            raise ValueError("%s has no records" % path)
+
+    def __len__(self):
+        return (len(self.data) - HEADER.size) // self.record.size
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError
+
+        return self.record.unpack_from(self.data, HEADER.size + index * self.record.size)
+
+    def apply(self, index, robots, ball):
+        ### Moves robots and ball objects to the state of index-th record, returns its tick
+        values = self[index]
+
+        i = 1
+        for robot in robots:
+            robot.pos = Point(values[i], values[i + 1])
+            robot.angle = values[i + 2]
+            robot.vel = Vec.fromXY(values[i + 3], values[i + 4])
+            for j, wheel in enumerate(robot.wheels):
+                wheel.vel = values[i + 5 + j]
+            i += 5 + self.wheelsCount
+
+        ball.pos = Point(values[i], values[i + 1])
+        ball.vel = Vec.fromXY(values[i + 2], values[i + 3])
+
+        return values[0]
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+class ReplayEngine:
+    ### Same interface as PhysEngine for GraphEngine and CanvasArea, but reads states from recording
+    def __init__(self, path, speed=1):
+        self.replay = Replay(path)
+        self.robots = [Robot() for i in range(self.replay.robotsCount)]
+        self.ball = Ball()
+        self.speed = speed
+        self.paused = False
+
+        self.alpha = 1
+        self.behind = False
+        self.droppedTime = 0
+
+        self.lastUpdate = None
+        self.position = 0
+        self.seek(0)
+
+    def seek(self, index):
+        self.position = min(max(index, 0), len(self.replay) - 1)
+        self.tick = self.replay.apply(int(self.position), self.robots, self.ball)
+
+        for obj in self.robots + [self.ball]:
+            obj.prevPos = obj.pos
+            obj.prevAngle = getattr(obj, 'angle', 0)
+
+    def update(self):
+        ### Plays in real time multiplied by speed
+        now = perf_counter()
+        if self.lastUpdate is not None and not self.paused:
+            self.seek(self.position + (now - self.lastUpdate) * self.speed / self.replay.dt)
+        self.lastUpdate = now
+
+    def setRobotTarget(self, point):
+        pass
@@ -0,0 +1,128 @@
+import argparse
+import os
+import sys
+from multiprocessing import Pool
+from time import perf_counter
+from PyQt5 import QtGui
+from design import GraphEngine
+from palette import Palette, White
+from engine import PhysEngine
+from recorder import Recorder, Replay, ReplayEngine
+from headless import simulate
+
+def renderImage(engine, width, height, graph=None, image=None):
+    ### Draws engine state into opaque QImage without window, graph and image may be reused between frames
+    if graph is None:
+        graph = GraphEngine(None, engine, None)
+        graph.resize(width, height)
+    if image is None:
+        image = QtGui.QImage(width, height, QtGui.QImage.Format_RGB32)
+
+    image.fill(Palette(White))
+    painter = QtGui.QPainter(image)
+    graph.paint(painter)
+    painter.end()
+
+    return image
+
+def renderRange(task):
+    ### Executed in worker process: saves every-th record from start to stop, file names are frame numbers
+    path, directory, start, stop, every, width, height, format = task
+
+    engine = ReplayEngine(path)
+    graph = GraphEngine(None, engine, None)
+    graph.resize(width, height)
+    image = QtGui.QImage(width, height, QtGui.QImage.Format_RGB32)
+
+    for index in range(start, stop, every):
+        engine.seek(index)
+        renderImage(engine, width, height, graph, image)
+        if not image.save(os.path.join(directory, "%06d.%s" % (index // every, format))):
+            raise OSError("Cannot write frame %d of %s to %s" % (index, path, directory))
+
+    engine.replay.close()
+    return len(range(start, stop, every))
+
+def frameTasks(path, directory, width, height, fps=None, start=0, stop=None, format='png', chunk=50):
+    ### Tasks of chunk frames each, many more tasks than workers keep all of them busy till the end
+    replay = Replay(path)
+    every = 1 if fps is None else max(1, round(1 / (fps * replay.dt)))
+    stop = len(replay) if stop is None else min(stop, len(replay))
+    replay.close()
+
+    ### Frames are numbered from the first record, ranges start at multiples of every
+    start = -(-start // every) * every
+    step = every * chunk
+    return [(path, directory, first, min(first + step, stop), every, width, height, format) for first in range(start, stop, step)]
+
+def exportFrames(paths, output, width=1280, height=960, fps=None, start=0, stop=None, format='png', workers=None, quiet=False):
+    ### Renders recordings to numbered images on all cores, each recording goes to own directory when there are several
+    tasks = []
+    for path in paths:
+        directory = output if len(paths) == 1 else os.path.join(output, os.path.splitext(os.path.basename(path))[0])
+        os.makedirs(directory, exist_ok=True)
+        tasks += frameTasks(path, directory, width, height, fps, start, stop, format)
+
+    total = sum(len(range(task[2], task[3], task[4])) for task in tasks)
+    done = 0
+    ts = perf_counter()
+
+    with Pool(workers) as pool:
+        for count in pool.imap_unordered(renderRange, tasks):
+            done += count
+            if not quiet:
+                print("\r%d/%d frames, %.0f per second" % (done, total, done / (perf_counter() - ts)), end='', file=sys.stderr)
+
+    if not quiet:
+        print(file=sys.stderr)
+
+    return done
+
+def recordMatch(path, duration, robots=1, controllers=(), dt=0.001, every=10):
+    ### Simulates a match without window into a recording
+    engine = PhysEngine(robotsCount=robots)
+    engine.recorder = Recorder(path, engine, dt, every)
+    if controllers:
+        from controllers import ControllerHost
+
+        for i, robot in enumerate(engine.robots):
+            robot.team = i * len(controllers) // len(engine.robots)
+        engine.controllers = ControllerHost(engine, controllers)
+
+    try:
+        simulate(engine, duration, dt)
+    finally:
+        engine.recorder.close()
+        if engine.controllers is not None:
+            engine.controllers.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render recorded matches to numbered images")
+    parser.add_argument("recordings", nargs='*', help="files made by --record")
+    parser.add_argument("-o", "--output", default="frames", help="directory for images, a subdirectory per recording if there are several")
+    parser.add_argument("--size", default="1280x960", help="image size, WIDTHxHEIGHT")
+    parser.add_argument("--fps", type=float, default=None, help="frames per second of match time, every record by default")
+    parser.add_argument("--start", type=int, default=0, help="first record")
+    parser.add_argument("--stop", type=int, default=None, help="record after the last one")
+    parser.add_argument("--format", default="png", help="image format, e.g. png or jpg")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="processes, one per core by default")
+    parser.add_argument("--simulate", type=float, default=None, metavar="SECONDS", help="record a new match first and render it")
+    parser.add_argument("-r", "--robots", type=int, default=1, help="robots count of simulated match")
+    parser.add_argument("-c", "--controller", action="append", default=[], metavar="MODULE:FUNCTION",
+                        help="team controller of simulated match, once per team")
+    args = parser.parse_args(argv)
+
+    width, height = map(int, args.size.lower().split('x'))
+    recordings = list(args.recordings)
+    if args.simulate is not None:
+        os.makedirs(args.output, exist_ok=True)
+        recordings.append(os.path.join(args.output, "match.bin"))
+        recordMatch(recordings[-1], args.simulate, args.robots, args.controller)
+
+    if not recordings:
+        parser.error("no recordings, pass files or --simulate")
+
+    exportFrames(recordings, args.output, width, height, args.fps, args.start, args.stop, args.format, args.workers)
+
+if __name__ == '__main__':
+    main()
@@ -1,41 +1,47 @@
 from physics import *
+from kinematics import Kinematics
 
 MAX_VEL = 3
 FRICTION = 0.05
 
-class Ball:
+class Ball(Circle):
     def __init__(self):
-        self.pos = Point(0, 0)
-        self.vel = Vec(1.5, PI / 4)
+        super(Ball, self).__init__(r=0.035, pos=Point(0, 0), vel=Vec(1.5, PI / 4))
 
-        self.r = 0.035
         self.bounceFactor = 0.7
         self.friction = 0.1
 
     def update(self, dt):
-        self.pos += vec2point(self.vel) * dt
+        self.pos.addScaled(self.vel, dt)
         self.vel.size -= self.friction * dt
 
         if self.vel.size < 0:
             self.vel.size = 0
 
-class Robot:
-    def __init__(self):
-        self.pos = Point(0.5, 0)
+### Wheels angles of default 4 wheels robot, radians
+WHEELS_ANGLES = (45 * DEG2RAD, 135 * DEG2RAD, 225 * DEG2RAD, 315 * DEG2RAD)
+
+class Robot(Circle):
+    def __init__(self, wheelsAngles=WHEELS_ANGLES, team=0):
+        super(Robot, self).__init__(r=0.11, mass=2.2, pos=Point(0.5, 0), vel=Vec(0, 0))
         self.angle = 0
 
-        self.r = 0.11
-        self.wheelsR = 0.08
-        self.m = 2.2
+        ### Index of team controller, see ControllerHost
+        self.team = team
 
-        self.vel = Vec(0, 0)
+        ### Robot was at wall on previous step, for wall events
+        self.touchingWall = False
+
+        self.wheelsR = 0.08
 
-        self.wheels = [Wheel(45 * DEG2RAD), Wheel(135 * DEG2RAD), Wheel(225 * DEG2RAD), Wheel(315 * DEG2RAD)]
+        self.wheels = [Wheel(angle) for angle in wheelsAngles]
+        self.kinematics = Kinematics.get(tuple(wheelsAngles))
 
     def touch(self, obj):
-        delta = point2vec(obj.pos - self.pos)
-        if delta.size <= self.r + obj.r:
-            return True, [delta.dir]
+        dx = obj.pos.x - self.pos.x
+        dy = obj.pos.y - self.pos.y
+        if dx * dx + dy * dy <= (self.r + obj.r) ** 2:
+            return True, [atan2(dy, dx)]
         else:
             return False, None
 
@@ -62,23 +68,22 @@ class Robot:
         if abs(u) > 0.3:
             u = sign(u) * 0.3
 
-        v = [(vel * sin(wheel.angle + dir - self.angle)) for wheel in self.wheels]
-        k = abs(vel) / max([abs(x) for x in v])
+        v = self.kinematics.wheels(vel * cos(dir - self.angle), vel * sin(dir - self.angle))
+        vMax = max([abs(x) for x in v])
+        k = abs(vel) / vMax if vMax > 0 else 0
         v = [(vm * k + u) for vm in v]
 
         self.setMotors(v)
 
     def calcOmega(self):
-        vels = [x.vel for x in self.wheels]
-        omega = sum(vels) / len(self.wheels)
+        omega = sum(wheel.vel for wheel in self.wheels) / len(self.wheels)
 
         dOmega = 0
-        delta = [0] * 4
-        for i, wheel in enumerate(self.wheels):
-            delta[i] = wheel.vel - omega
-            if abs(delta[i]) > FRICTION:
-                delta[i] = sign(delta[i]) * FRICTION
-            dOmega += delta[i]
+        for wheel in self.wheels:
+            delta = wheel.vel - omega
+            if abs(delta) > FRICTION:
+                delta = sign(delta) * FRICTION
+            dOmega += delta
 
         if sign(dOmega + omega) != sign(omega):
             omega = 0
@@ -88,22 +93,16 @@ class Robot:
         return omega / self.wheelsR
 
     def calcVel(self):
-        wholeVel = Point(0, 0)
-        for wheel in self.wheels:
-            wholeVel += Point(cos(wheel.angle), sin(wheel.angle)) * wheel.vel
-
-        velNF = point2vec(wholeVel)
-
-        deltaVel = Point()
-        for i, wheel in enumerate(self.wheels):
-            dV = cos(velNF.dir - wheel.angle) * velNF.size - wheel.vel
-            deltaVel += Point(cos(wheel.angle), sin(wheel.angle)) * dV
+        wholeX, wholeY, deltaX, deltaY = self.kinematics.velocity([wheel.vel for wheel in self.wheels])
 
-        deltaVelVec = point2vec(deltaVel)
-        if deltaVelVec.size > FRICTION * 4:
-            deltaVelVec.size = FRICTION * 4
+        ### Wheels slip, but friction limits lost velocity
+        maxDelta = FRICTION * len(self.wheels)
+        deltaSize = sqrt(deltaX * deltaX + deltaY * deltaY)
+        if deltaSize > maxDelta:
+            deltaX *= maxDelta / deltaSize
+            deltaY *= maxDelta / deltaSize
 
-        return point2vec(wholeVel - vec2point(deltaVelVec))
+        return Vec.fromXY(wholeX - deltaX, wholeY - deltaY)
 
 class Wheel:
     def __init__(self, angle=0):
@@ -111,6 +110,8 @@ class Wheel:
         self.target = 0
         self.acc = 25
         self.angle = angle
+        self.cos = cos(angle)
+        self.sin = sin(angle)
 
     def update(self, dt=0.001):
         if abs(abs(self.vel) - abs(self.target)) > self.acc * dt:
@@ -0,0 +1,164 @@
+import numpy as np
+from physics import PI
+from field import Field
+
+class Noise:
+    ### Gaussian noise, dead readings with dropout probability and quantization step, applied in place
+    def __init__(self, std=0, dropout=0, step=None):
+        self.std = std
+        self.dropout = dropout
+        self.step = step
+
+    def apply(self, values, rng):
+        if self.std:
+            values += rng.normal(0, self.std, values.shape)
+        if self.dropout:
+            values[rng.random(values.shape) < self.dropout] = 0
+        if self.step:
+            np.round(values / self.step, out=values)
+            values *= self.step
+
+        return values
+
+class IRRing:
+    ### Ball sensors around the robot, angles relative to Robot.angle. Reading is response of the sensor
+    ### to the ball direction times falloff with distance, 1 for the ball touching the sensor straight ahead.
+    ### Response is taken from a table over bins of ball direction, so reading does not depend on sensors count
+    def __init__(self, count=16, offset=0, sharpness=4, falloff=0.3, bins=720, noise=None):
+        self.count = count
+        self.angles = offset + 2 * PI * np.arange(count) / count
+        self.falloff = falloff
+        self.bins = bins
+        self.noise = noise or Noise(std=0.01)
+
+        ### table[bin, sensor], cos lobe of every sensor for the ball direction in the middle of bin
+        directions = 2 * PI * (np.arange(bins) + 0.5) / bins
+        self.table = np.maximum(np.cos(directions[:, None] - self.angles[None, :]), 0) ** sharpness
+
+    def read(self, robotPos, robotAngle, ballPos, out, rng):
+        delta = ballPos[..., None, :] - robotPos
+        distance = np.hypot(delta[..., 0], delta[..., 1])
+        direction = np.arctan2(delta[..., 1], delta[..., 0]) - robotAngle
+
+        index = np.mod(direction * (self.bins / (2 * PI)), self.bins).astype(np.int64) % self.bins
+        np.take(self.table, index, axis=0, out=out)
+        out *= (1 / (1 + (distance / self.falloff) ** 2))[..., None]
+
+        self.noise.apply(out, rng)
+        np.maximum(out, 0, out=out)
+
+        return out
+
+class LineSensors:
+    ### Reflectance sensors under the robot at points in robot frame, meters. Reading is white reflectance on
+    ### painted lines of Field and green elsewhere, plus noise
+    def __init__(self, points=None, white=0.9, green=0.2, noise=None):
+        if points is None:
+            ### Ring of 8 sensors
+            angles = 2 * PI * np.arange(8) / 8
+            points = np.stack([0.08 * np.cos(angles), 0.08 * np.sin(angles)], axis=1)
+
+        self.points = np.asarray(points, dtype=np.float64)
+        self.count = len(self.points)
+        self.white = white
+        self.green = green
+        self.noise = noise or Noise(std=0.03)
+
+        ### Line distances of Field.grid as 2d array, taken again when field is configured
+        self.grid = None
+
+    def read(self, robotPos, robotAngle, out, rng):
+        ### Two trig calls per robot, sensor points are rotated by them
+        cos, sin = np.cos(robotAngle)[..., None], np.sin(robotAngle)[..., None]
+        x = robotPos[..., 0, None] + self.points[:, 0] * cos - self.points[:, 1] * sin
+        y = robotPos[..., 1, None] + self.points[:, 0] * sin + self.points[:, 1] * cos
+
+        ### Distance to painted lines from the field grid, points outside of it are green
+        grid = Field.grid or Field.loadGrid()
+        if self.grid is not grid:
+            self.grid = grid
+            self.lines = np.frombuffer(grid.line, dtype=np.float32).reshape(grid.rows, grid.columns)
+
+        column = np.floor((x - grid.x) * grid.scale).astype(np.int64)
+        row = np.floor((y - grid.y) * grid.scale).astype(np.int64)
+        inside = (column >= 0) & (column < grid.columns) & (row >= 0) & (row < grid.rows)
+        onLine = inside & (self.lines[np.clip(row, 0, grid.rows - 1), np.clip(column, 0, grid.columns - 1)] < 0)
+
+        out[...] = np.where(onLine, self.white, self.green)
+        self.noise.apply(out, rng)
+
+        return out
+
+class Compass:
+    ### Heading of the robot in [-PI, PI) with constant bias, noise and resolution of the real sensor
+    def __init__(self, bias=0, noise=None):
+        self.bias = bias
+        self.noise = noise or Noise(std=0.01, step=PI / 180)
+
+    def read(self, robotAngle, out, rng):
+        np.add(robotAngle, self.bias, out=out)
+        self.noise.apply(out, rng)
+        out -= 2 * PI * np.floor((out + PI) / (2 * PI))
+
+        return out
+
+class Sensors:
+    ### Readings of all robots in one vectorized pass. Arrays may have leading batch dimensions as in World,
+    ### readings are written into buffers kept between calls, copy them to keep
+    def __init__(self, irRing=None, line=None, compass=None, seed=None):
+        self.irRing = irRing or IRRing()
+        self.line = line or LineSensors()
+        self.compass = compass or Compass()
+        self.rng = np.random.default_rng(seed)
+
+        self.buffers = {}
+
+        ### Engine state as arrays, see readEngine
+        self.robotPos = None
+
+    @property
+    def layout(self):
+        ### Names and sizes of readings of one robot, in order of values
+        return [('ir', self.irRing.count), ('line', self.line.count), ('compass', 1)]
+
+    @property
+    def size(self):
+        return sum(size for name, size in self.layout)
+
+    def read(self, robotPos, robotAngle, ballPos):
+        ### Returns dict of ir (..., robots, ir count), line (..., robots, line count) and compass (..., robots)
+        shape = robotAngle.shape
+        if shape not in self.buffers:
+            self.buffers[shape] = {
+                'ir': np.empty(shape + (self.irRing.count,)),
+                'line': np.empty(shape + (self.line.count,)),
+                'compass': np.empty(shape),
+            }
+        readings = self.buffers[shape]
+
+        self.irRing.read(robotPos, robotAngle, ballPos, readings['ir'], self.rng)
+        self.line.read(robotPos, robotAngle, readings['line'], self.rng)
+        self.compass.read(robotAngle, readings['compass'], self.rng)
+
+        return readings
+
+    def readWorld(self, world):
+        return self.read(world.robotPos, world.robotAngle, world.ballPos)
+
+    def readEngine(self, engine):
+        if self.robotPos is None or len(self.robotPos) != len(engine.robots):
+            self.robotPos = np.empty((len(engine.robots), 2))
+            self.robotAngle = np.empty(len(engine.robots))
+            self.ballPos = np.empty(2)
+
+        engine.syncBall()
+        for i, robot in enumerate(engine.robots):
+            self.robotPos[i] = robot.pos.x, robot.pos.y
+            self.robotAngle[i] = robot.angle
+        self.ballPos[:] = engine.ball.pos.x, engine.ball.pos.y
+
+        return self.read(self.robotPos, self.robotAngle, self.ballPos)
+
+    def values(self, readings, robot):
+        ### Flat list of readings of one robot in layout order, see controllers.splitReadings
+        return readings['ir'][robot].tolist() + readings['line'][robot].tolist() + [float(readings['compass'][robot])]
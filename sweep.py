@@ -0,0 +1,142 @@
+import argparse
+import csv
+import os
+import random
+import sys
+from itertools import product
+from multiprocessing import Pool
+from time import perf_counter
+import robot
+from engine import PhysEngine
+from headless import simulate
+
+### Tunable physics constants and how to apply them to a new engine
+PARAMS = {
+    'MAX_VEL': lambda engine, value: setattr(robot, 'MAX_VEL', value),
+    'FRICTION': lambda engine, value: setattr(robot, 'FRICTION', value),
+    'acc': lambda engine, value: [setattr(wheel, 'acc', value) for r in engine.robots for wheel in r.wheels],
+    'bounceFactor': lambda engine, value: setattr(engine.ball, 'bounceFactor', value),
+    'friction': lambda engine, value: setattr(engine.ball, 'friction', value),
+}
+
+RESULT_FIELDS = ['status', 'steps', 'elapsed', 'ballX', 'ballY', 'ballVel', 'robotX', 'robotY', 'robotAngle']
+
+def gridTasks(grid):
+    ### grid is {name: [values]}, tasks are all combinations
+    names = list(grid)
+    return [dict(zip(names, values)) for values in product(*(grid[name] for name in names))]
+
+def randomTasks(ranges, count, seed=0):
+    ### ranges is {name: (low, high)}, same seed gives same tasks, so sweep can be resumed
+    rnd = random.Random(seed)
+    return [{name: rnd.uniform(low, high) for name, (low, high) in ranges.items()} for i in range(count)]
+
+def runTask(args):
+    ### Executed in worker process, module constants changed here do not affect other workers
+    index, params, settings = args
+
+    defaults = {'MAX_VEL': robot.MAX_VEL, 'FRICTION': robot.FRICTION}
+    engine = PhysEngine(robotsCount=settings['robots'])
+    for name, value in params.items():
+        PARAMS[name](engine, value)
+
+    ts = perf_counter()
+    try:
+        steps = simulate(engine, settings['time'], settings['dt'], timeLimit=settings['timeout'])
+        status = 'ok'
+    except TimeoutError:
+        steps = 0
+        status = 'timeout'
+    except Exception as e:
+        steps = 0
+        status = 'error: %s' % e
+    finally:
+        for name, value in defaults.items():
+            setattr(robot, name, value)
+
+    ball = engine.ball
+    first = engine.robots[0]
+    return index, params, [status, steps, perf_counter() - ts, ball.pos.x, ball.pos.y, ball.vel.size, first.pos.x, first.pos.y, first.angle]
+
+### Settings of a run which change its results, they are written to every row so a table is resumed only by the same run
+SETTING_FIELDS = ['time', 'dt', 'robots']
+
+def cell(value):
+    ### Value as csv module writes it
+    return '' if value is None else str(value)
+
+def loadDone(path, keys):
+    ### Indices of tasks which are already in results table. keys maps index of every task to columns which identify it,
+    ### a table of another run (other tasks or settings) can not be resumed
+    if not os.path.exists(path):
+        return set()
+
+    done = set()
+    with open(path) as file:
+        for row in csv.DictReader(file):
+            index = int(row['index'])
+            key = keys.get(index)
+            if key is None or any(row.get(name) != cell(value) for name, value in key.items()):
+                raise ValueError("%s has results of another run in row of task %d, use other output file" % (path, index))
+            done.add(index)
+
+    return done
+
+def sweep(tasks, output, time=10, dt=0.001, robots=1, timeout=None, workers=None):
+    settings = {'time': time, 'dt': dt, 'robots': robots, 'timeout': timeout}
+    done = loadDone(output, {i: dict(params, **{name: settings[name] for name in SETTING_FIELDS}) for i, params in enumerate(tasks)})
+    pending = [(i, params, settings) for i, params in enumerate(tasks) if i not in done]
+
+    if not pending:
+        return 0
+
+    names = list(tasks[0])
+    newFile = not os.path.exists(output) or os.path.getsize(output) == 0
+
+    with open(output, 'a', newline='') as file, Pool(workers or os.cpu_count()) as pool:
+        writer = csv.writer(file)
+        if newFile:
+            writer.writerow(['index'] + names + SETTING_FIELDS + RESULT_FIELDS)
+
+        for count, (index, params, result) in enumerate(pool.imap_unordered(runTask, pending), 1):
+            writer.writerow([index] + [params[name] for name in names] + [settings[name] for name in SETTING_FIELDS] + result)
+            file.flush()
+
+            print("%d/%d done (%d total)" % (count, len(pending), len(tasks)), file=sys.stderr)
+
+    return len(pending)
+
+def parseValues(text):
+    name, values = text.split('=')
+    if name not in PARAMS:
+        raise argparse.ArgumentTypeError("unknown parameter %s, expected one of %s" % (name, ', '.join(PARAMS)))
+
+    return name, values
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run headless simulations for many physics constants")
+    parser.add_argument("--grid", type=parseValues, action="append", default=[], help="NAME=v1,v2,...")
+    parser.add_argument("--range", type=parseValues, action="append", default=[], help="NAME=low:high, used with --samples")
+    parser.add_argument("--samples", type=int, default=0, help="random samples from --range")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-t", "--time", type=float, default=10, help="simulated time of every run, seconds")
+    parser.add_argument("--dt", type=float, default=0.001, help="physics step, seconds")
+    parser.add_argument("-r", "--robots", type=int, default=1, help="robots count")
+    parser.add_argument("--timeout", type=float, default=None, help="wall time limit of every run, seconds")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="processes, one per core by default")
+    parser.add_argument("-o", "--output", default="sweep.csv", help="results table, existing rows are skipped")
+    args = parser.parse_args(argv)
+
+    if args.samples:
+        ranges = {name: tuple(map(float, values.split(':'))) for name, values in args.range}
+        tasks = randomTasks(ranges, args.samples, args.seed)
+    else:
+        tasks = gridTasks({name: list(map(float, values.split(','))) for name, values in args.grid})
+
+    try:
+        sweep(tasks, args.output, args.time, args.dt, args.robots, args.timeout, args.workers)
+    except ValueError as e:
+        parser.error(str(e))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+import argparse
+import csv
+import multiprocessing as mp
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from itertools import combinations
+from time import perf_counter
+from physics import Point
+from engine import PhysEngine
+from field import Field
+from controllers import LocalControllers, loadController
+from headless import simulate
+from sweep import loadDone
+
+### Settings which change results of matches, they are written to every row so a table is resumed only by the same tournament
+SETTING_FIELDS = ['time', 'dt', 'robots', 'controlPeriod', 'continuous']
+RESULT_FIELDS = ['index', 'home', 'away', 'side', 'seed'] + SETTING_FIELDS + ['homeGoals', 'awayGoals', 'status', 'elapsed']
+
+def schedule(specs, seeds=1):
+    ### Every pair plays every seed twice, home team attacks positive x in side 0 and negative x in side 1
+    return [(home, away, side, seed) for home, away in combinations(specs, 2) for seed in range(seeds) for side in (0, 1)]
+
+def preload(specs, started):
+    ### Worker initializer, control code is imported once per worker, not once per match
+    global startedQueue
+    startedQueue = started
+
+    for spec in specs:
+        loadController(spec)
+
+startedQueue = None
+
+def kickoff(engine, attacks, rnd):
+    ### Teams on own halves, ball in the center, small random offsets
+    for team, attack in enumerate(attacks):
+        robots = [robot for robot in engine.robots if robot.team == team]
+        for i, robot in enumerate(robots):
+            robot.pos = Point(-attack * (0.3 + 0.3 * (i // 2)) + rnd.uniform(-0.03, 0.03),
+                              (0.3 if i % 2 else -0.3) * (i > 0) + rnd.uniform(-0.03, 0.03))
+            robot.angle = 0
+            robot.vel.size = 0
+            for wheel in robot.wheels:
+                wheel.vel = 0
+                wheel.target = 0
+
+    engine.ball.pos = Point(rnd.uniform(-0.02, 0.02), rnd.uniform(-0.02, 0.02))
+    engine.ball.vel.size = 0
+    engine.freeBall = None
+
+def playMatch(task):
+    ### Executed in worker process
+    index, home, away, side, seed, settings = task
+    if startedQueue is not None:
+        startedQueue.put(index)
+
+    rnd = random.Random(seed)
+    attacks = [1, -1] if side == 0 else [-1, 1]
+
+    engine = PhysEngine(robotsCount=2 * settings['robots'], continuous=settings['continuous'])
+    for i, robot in enumerate(engine.robots):
+        robot.team = i // settings['robots']
+    engine.controllers = LocalControllers([home, away], settings['controlPeriod'], attacks)
+    kickoff(engine, attacks, rnd)
+
+    goals = [0, 0]
+
+    def checkGoal(i):
+        ### Ball is behind the goal line only for a few steps before it bounces out, goals are checked after every step
+        goal = Field.goal(engine.ball)
+        if goal:
+            goals[attacks.index(goal)] += 1
+            kickoff(engine, attacks, rnd)
+
+    ts = perf_counter()
+    status = 'ok'
+    try:
+        simulate(engine, settings['time'], settings['dt'], settings['controlPeriod'], settings['timeout'], onStep=checkGoal)
+    except TimeoutError:
+        status = 'timeout'
+    finally:
+        engine.controllers.close()
+
+    if any(engine.controllers.errors):
+        status = 'controller errors %d/%d' % tuple(engine.controllers.errors)
+
+    return [index, home, away, side, seed] + [settings[name] for name in SETTING_FIELDS] + [goals[0], goals[1], status, perf_counter() - ts]
+
+class Standings:
+    def __init__(self, specs):
+        self.rows = {spec: {'played': 0, 'won': 0, 'drawn': 0, 'lost': 0, 'for': 0, 'against': 0, 'points': 0} for spec in specs}
+
+    def add(self, home, away, homeGoals, awayGoals):
+        for spec, scored, conceded in ((home, homeGoals, awayGoals), (away, awayGoals, homeGoals)):
+            row = self.rows[spec]
+            row['played'] += 1
+            row['for'] += scored
+            row['against'] += conceded
+            if scored > conceded:
+                row['won'] += 1
+                row['points'] += 3
+            elif scored == conceded:
+                row['drawn'] += 1
+                row['points'] += 1
+            else:
+                row['lost'] += 1
+
+    def table(self):
+        ranked = sorted(self.rows.items(), key=lambda item: (-item[1]['points'], item[1]['against'] - item[1]['for'], item[0]))
+        width = max(len(spec) for spec in self.rows)
+
+        lines = ["%-*s %3s %3s %3s %3s %4s %4s %4s" % (width, 'controller', 'P', 'W', 'D', 'L', 'GF', 'GA', 'Pts')]
+        for spec, row in ranked:
+            lines.append("%-*s %3d %3d %3d %3d %4d %4d %4d" % (width, spec, row['played'], row['won'], row['drawn'], row['lost'],
+                                                              row['for'], row['against'], row['points']))
+
+        return '\n'.join(lines)
+
+def loadResults(path):
+    if not os.path.exists(path):
+        return []
+
+    with open(path) as file:
+        return list(csv.DictReader(file))
+
+def tournament(specs, output, seeds=1, time=60, dt=0.001, robots=2, controlPeriod=0.016, continuous=False,
+               timeout=None, workers=None, retries=2, quiet=False):
+    ### Plays all matches on a pool of reused workers, results are appended to output table as they come;
+    ### rerunning the same tournament skips played matches. Matches of a crashed worker are played again
+    settings = {'time': time, 'dt': dt, 'robots': robots, 'controlPeriod': controlPeriod, 'continuous': continuous, 'timeout': timeout}
+
+    ### Bad specs fail here at once, in worker initializer they would break every pool before any match starts
+    for spec in specs:
+        loadController(spec)
+
+    matches = schedule(specs, seeds)
+    keys = {i: dict(zip(RESULT_FIELDS[1:5], match), **{name: settings[name] for name in SETTING_FIELDS}) for i, match in enumerate(matches)}
+    done = loadDone(output, keys)
+    pending = {i: (i,) + match + (settings,) for i, match in enumerate(matches) if i not in done}
+
+    standings = Standings(specs)
+    for row in loadResults(output):
+        if row['status'] != 'failed':
+            standings.add(row['home'], row['away'], int(row['homeGoals']), int(row['awayGoals']))
+
+    newFile = not os.path.exists(output) or os.path.getsize(output) == 0
+    context = mp.get_context()
+    attempts = dict.fromkeys(pending, 0)
+
+    with open(output, 'a', newline='') as file:
+        writer = csv.writer(file)
+        if newFile:
+            writer.writerow(RESULT_FIELDS)
+
+        def write(result):
+            writer.writerow(result)
+            file.flush()
+
+        def fail(i):
+            ### Matches which failed too many times are recorded as failed
+            attempts[i] += 1
+            if attempts[i] > retries:
+                write(list(pending.pop(i)[:5]) + [settings[name] for name in SETTING_FIELDS] + [0, 0, 'failed', 0])
+
+        def play(indices, poolSize):
+            ### Plays matches on a new pool, returns matches which were being played when a worker died
+            started = context.Queue()
+            broken = False
+
+            with ProcessPoolExecutor(poolSize, context, initializer=preload, initargs=(specs, started)) as pool:
+                futures = {pool.submit(playMatch, pending[i]): i for i in indices}
+                for future in as_completed(futures):
+                    i = futures[future]
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        broken = True
+                        continue
+                    except Exception as e:
+                        print("match %d failed: %s" % (i, e), file=sys.stderr)
+                        fail(i)
+                        continue
+
+                    pending.pop(i)
+                    write(result)
+                    row = dict(zip(RESULT_FIELDS, result))
+                    standings.add(row['home'], row['away'], row['homeGoals'], row['awayGoals'])
+
+                    if not quiet:
+                        print("%d/%d played\n%s\n" % (len(matches) - len(pending), len(matches), standings.table()), file=sys.stderr)
+
+            suspects = set()
+            while broken and not started.empty():
+                suspects.add(started.get())
+
+            ### Pool broke before any match started, e.g. in initializer, all its matches are suspects
+            if broken and not suspects:
+                suspects = set(indices)
+
+            return suspects & set(pending)
+
+        suspects = set()
+        while pending:
+            if not suspects:
+                suspects = play(list(pending), workers or os.cpu_count())
+                continue
+
+            ### Which of matches played together killed the worker is unknown, each of them is played alone
+            print("Worker crashed, %d matches are played again one by one" % len(suspects), file=sys.stderr)
+            for i in sorted(suspects):
+                if play([i], 1):
+                    fail(i)
+            suspects = {i for i in suspects if i in pending}
+
+    return standings
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Round-robin tournament of team controllers")
+    parser.add_argument("controllers", nargs='+', metavar="MODULE:FUNCTION")
+    parser.add_argument("-s", "--seeds", type=int, default=1, help="matches of every pair per side")
+    parser.add_argument("-t", "--time", type=float, default=60, help="match length, simulated seconds")
+    parser.add_argument("--dt", type=float, default=0.001, help="physics step, seconds")
+    parser.add_argument("-r", "--robots", type=int, default=2, help="robots per team")
+    parser.add_argument("--continuous", action="store_true", help="continuous collisions, allows larger --dt")
+    parser.add_argument("--timeout", type=float, default=None, help="wall time limit of every match, seconds")
+    parser.add_argument("--retries", type=int, default=2, help="attempts of a match after worker crash")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="processes, one per core by default")
+    parser.add_argument("-o", "--output", default="tournament.csv", help="results table, played matches are skipped")
+    args = parser.parse_args(argv)
+
+    if len(set(args.controllers)) < 2:
+        parser.error("at least two different controllers are needed")
+
+    try:
+        standings = tournament(args.controllers, args.output, args.seeds, args.time, args.dt, args.robots,
+                               continuous=args.continuous, timeout=args.timeout, workers=args.workers, retries=args.retries)
+    except ValueError as e:
+        parser.error(str(e))
+    print(standings.table())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+import multiprocessing as mp
+from queue import Empty
+from time import perf_counter, sleep
+from engine import PhysEngine
+
+class TripleBuffer:
+    ### Single writer, single reader exchange of fixed size float arrays between processes.
+    ### Writer fills own back slot and swaps it with the middle one, reader takes the middle one if it is newer;
+    ### lock is held only for the swap of slot indices, never for copying
+    def __init__(self, size, context=mp):
+        self.size = size
+        self.data = context.Array('d', size * 3, lock=False)
+
+        ### back (writer), middle (latest published), front (reader) slots and middle freshness flag
+        self.slots = context.Array('i', [0, 1, 2, 0], lock=False)
+        self.lock = context.Lock()
+
+    def write(self, values):
+        back = self.slots[0]
+        self.data[back * self.size:(back + 1) * self.size] = values
+
+        with self.lock:
+            self.slots[0], self.slots[1] = self.slots[1], back
+            self.slots[3] = 1
+
+    def read(self):
+        ### Latest published values or None if nothing new was published
+        with self.lock:
+            if not self.slots[3]:
+                return None
+
+            self.slots[1], self.slots[2] = self.slots[2], self.slots[1]
+            self.slots[3] = 0
+            front = self.slots[2]
+
+        return self.data[front * self.size:(front + 1) * self.size]
+
+def runPhysics(buffer, commands, stats, stop, robotsCount, dt, publishPeriod, controlPeriod, realTime):
+    ### Worker process: steps physics with fixed dt and publishes snapshots
+    engine = PhysEngine(robotsCount=robotsCount)
+    stepsPerPublish = max(1, round(publishPeriod / dt))
+    stepsPerControl = max(1, round(controlPeriod / dt))
+
+    start = perf_counter()
+    steps = 0
+    dropped = 0
+    while not stop.is_set():
+        try:
+            while True:
+                name, args = commands.get_nowait()
+                getattr(engine, name)(*args)
+        except Empty:
+            pass
+
+        if realTime:
+            ### Keep up with wall time, drop what can not be caught up
+            behind = int((perf_counter() - start) / dt) - dropped - steps
+            if behind <= 0:
+                sleep(dt * stepsPerPublish / 2)
+                continue
+
+            if behind > stepsPerPublish * 10:
+                dropped += behind - stepsPerPublish
+
+        for i in range(stepsPerPublish):
+            if steps % stepsPerControl == 0:
+                engine.control()
+
+            engine.step(dt)
+            steps += 1
+
+        buffer.write(engine.snapshot())
+        stats[0] = steps
+        stats[1] = perf_counter() - start
+        stats[2] = dropped * dt
+
+class WorkerEngine:
+    ### PhysEngine interface for GraphEngine and CanvasArea, physics itself runs in another process
+    def __init__(self, robotsCount=1, dt=0.001, publishPeriod=0.004, controlPeriod=0.016, realTime=True):
+        context = mp.get_context('spawn')
+
+        ### Local engine is never stepped, it only holds the latest published state for drawing
+        self.view = PhysEngine(robotsCount=robotsCount)
+        self.robots = self.view.robots
+        self.ball = self.view.ball
+        self.dt = dt
+
+        self.alpha = 1
+        self.behind = False
+        self.droppedTime = 0
+        self.tick = 0
+
+        ### Physics throughput, steps per wall second
+        self.stepsPerSecond = 0
+        self.lastStats = (0, 0)
+
+        self.buffer = TripleBuffer(len(self.view.snapshot()), context)
+        self.commands = context.Queue()
+        self.stats = context.Array('d', 3, lock=False)
+        self.stop = context.Event()
+        self.process = context.Process(target=runPhysics, daemon=True,
+            args=(self.buffer, self.commands, self.stats, self.stop, robotsCount, dt, publishPeriod, controlPeriod, realTime))
+        self.process.start()
+
+    def update(self):
+        state = self.buffer.read()
+        if state is not None:
+            self.view.restore(state)
+            self.view.storePrevious()
+            self.tick = self.view.tick
+
+        steps, elapsed, droppedTime = self.stats
+        if elapsed - self.lastStats[1] >= 1:
+            self.stepsPerSecond = (steps - self.lastStats[0]) / (elapsed - self.lastStats[1])
+            self.lastStats = (steps, elapsed)
+
+        self.behind = droppedTime > self.droppedTime
+        self.droppedTime = droppedTime
+
+    def setRobotTarget(self, point):
+        self.commands.put(('setRobotTarget', (point,)))
+
+    def close(self):
+        self.stop.set()
+        self.process.join(1)
@@ -0,0 +1,331 @@
+import numpy as np
+import robot as robotModule
+from physics import PI
+from robot import Robot, Ball
+from field import Field
+
+class World:
+    def __init__(self, robotsCount=1, robot=None, ball=None, dtype=np.float64):
+        robot = robot or Robot()
+        ball = ball or Ball()
+
+        self.robotsCount = robotsCount
+        self.wheelsCount = len(robot.wheels)
+
+        ### Robot pairs in the order of PhysEngine.contacts, see separateRobots
+        self.pairI, self.pairJ = np.triu_indices(robotsCount, 1)
+
+        ### Robots state, one row per robot
+        self.robotPos = np.zeros((robotsCount, 2), dtype=dtype)
+        self.robotAngle = np.zeros(robotsCount, dtype=dtype)
+        self.robotVel = np.zeros((robotsCount, 2), dtype=dtype)
+        self.wheelVel = np.zeros((robotsCount, self.wheelsCount), dtype=dtype)
+        self.wheelTarget = np.zeros((robotsCount, self.wheelsCount), dtype=dtype)
+
+        ### Ball state
+        self.ballPos = np.zeros(2, dtype=dtype)
+        self.ballVel = np.zeros(2, dtype=dtype)
+
+        ### Every robot starts as the template one
+        self.robotPos[:] = tuple(robot.pos)
+        self.robotAngle[:] = robot.angle
+        self.ballPos[:] = tuple(ball.pos)
+        self.ballVel[:] = ball.vel.size * np.cos(ball.vel.dir), ball.vel.size * np.sin(ball.vel.dir)
+
+        self.setParams(robot, ball)
+
+    def setParams(self, robot, ball):
+        angles = np.array([wheel.angle for wheel in robot.wheels])
+
+        ### Unit vectors of wheels directions, one row per wheel
+        self.wheelDirs = np.ascontiguousarray(np.stack([np.cos(angles), np.sin(angles)], axis=1))
+
+        ### Wheels speeds times these give mean speed, whole velocity and its delta in Robot.calcVel and differences
+        ### of wheels from the mean speed in Robot.calcOmega, see stepArrays
+        count = len(angles)
+        self.wheelMatrix = np.column_stack([np.full(count, 1 / count), self.wheelDirs, self.wheelDirs @ self.wheelDirs.T @ self.wheelDirs - self.wheelDirs])
+        self.wheelCentering = np.eye(count) - 1 / count
+
+        ### Inverse kinematics for move, see Kinematics
+        self.wheelInverse = np.array(robot.kinematics.inverse)
+
+        self.robotR = robot.r
+        self.wheelsR = robot.wheelsR
+        self.wheelAcc = robot.wheels[0].acc
+        self.maxVel = robotModule.MAX_VEL
+        self.friction = robotModule.FRICTION
+
+        self.ballR = ball.r
+        self.bounceFactor = ball.bounceFactor
+        self.ballFriction = ball.friction
+
+        self.halfSize = (Field.size.width / 2, Field.size.height / 2)
+
+        ### Goal walls as min x, min y, max x, max y rows; objects with x inside of clearX touch no goal
+        self.goalBoxes = np.array([(wall.AABB.min.x, wall.AABB.min.y, wall.AABB.max.x, wall.AABB.max.y) for wall in Field.goalWalls]).reshape(-1, 4)
+        self.clearX = Field.clearX
+
+    @classmethod
+    def fromEngine(cls, engine):
+        world = cls(len(engine.robots), engine.robots[0], engine.ball)
+        world.load(engine)
+
+        return world
+
+    def load(self, engine):
+        ### Ball in event driven engine may be asleep
+        engine.syncBall()
+
+        for i, robot in enumerate(engine.robots):
+            self.robotPos[i] = tuple(robot.pos)
+            self.robotAngle[i] = robot.angle
+            self.robotVel[i] = tuple(robot.vel.size * np.array([np.cos(robot.vel.dir), np.sin(robot.vel.dir)]))
+            self.wheelVel[i] = [wheel.vel for wheel in robot.wheels]
+            self.wheelTarget[i] = [wheel.target for wheel in robot.wheels]
+
+        ball = engine.ball
+        self.ballPos[:] = tuple(ball.pos)
+        self.ballVel[:] = ball.vel.size * np.cos(ball.vel.dir), ball.vel.size * np.sin(ball.vel.dir)
+
+    def store(self, engine):
+        ### Write arrays back to engine objects, e.g. for drawing
+        for i, robot in enumerate(engine.robots):
+            robot.pos.x, robot.pos.y = self.robotPos[i]
+            robot.angle = float(self.robotAngle[i])
+            robot.vel.size = float(np.hypot(*self.robotVel[i]))
+            robot.vel.dir = float(np.arctan2(self.robotVel[i, 1], self.robotVel[i, 0]))
+
+            for wheel, vel, target in zip(robot.wheels, self.wheelVel[i], self.wheelTarget[i]):
+                wheel.vel = float(vel)
+                wheel.target = float(target)
+
+        ball = engine.ball
+        ball.pos.x, ball.pos.y = self.ballPos
+        ball.vel.size = float(np.hypot(*self.ballVel))
+        ball.vel.dir = float(np.arctan2(self.ballVel[1], self.ballVel[0]))
+
+    def setMotors(self, targets):
+        self.wheelTarget[...] = targets
+
+    def move(self, robot, vel, dir, heading):
+        ### Robot.move for robot-th robot, arguments are scalars or arrays over leading dimensions
+        angle = self.robotAngle[..., robot]
+
+        vel = np.clip(vel, -2, 2)
+        dir = dir + PI
+
+        ### Speed up along diagonals, as Robot.move does
+        _dir = np.mod(np.abs(dir), PI / 2)
+        _dir = np.where((_dir == 0) & (dir != 0), PI / 2, _dir)
+        _dir = np.minimum(_dir, PI / 2 - _dir)
+        vel = vel / np.cos(_dir)
+
+        err = np.mod(heading - angle + PI, 2 * PI) - PI
+        u = np.clip(err * 5, -0.3, 0.3)
+
+        v = np.stack([vel * np.cos(dir - angle), vel * np.sin(dir - angle)], axis=-1) @ self.wheelInverse.T
+        vMax = np.abs(v).max(axis=-1)
+        k = np.abs(vel) / np.where(vMax > 0, vMax, np.inf)
+
+        self.wheelTarget[..., robot, :] = v * k[..., None] + u[..., None]
+
+    def step(self, dt):
+        stepArrays(self, dt)
+
+def stepArrays(w, dt):
+    ### Same physics as PhysEngine.step, every array may have extra leading (batch) dimensions.
+    ### Sums over wheels are one matrix product of (robots, wheels) rows: reductions over short last axis are slow in numpy
+    shape = w.robotAngle.shape
+    wheelVel = w.wheelVel.reshape(-1, w.wheelsCount)
+    sums = wheelVel @ w.wheelMatrix.astype(wheelVel.dtype, copy=False)
+    omega, wholeX, wholeY, deltaX, deltaY = sums.T
+
+    ### Apply orientation changes, see Robot.calcOmega
+    deltas = wheelVel @ w.wheelCentering.astype(wheelVel.dtype, copy=False)
+    np.clip(deltas, -w.friction, w.friction, out=deltas)
+    newOmega = omega + deltas @ np.ones(w.wheelsCount, dtype=deltas.dtype)
+    newOmega *= newOmega * omega > 0
+    w.robotAngle += (newOmega * (dt / w.wheelsR)).reshape(shape)
+
+    ### Calculate velocity in robot coordinates, see Robot.calcVel
+    maxDelta = w.friction * w.wheelsCount
+    scale = maxDelta / np.maximum(np.sqrt(deltaX * deltaX + deltaY * deltaY), maxDelta)
+    localX = (wholeX - deltaX * scale).reshape(shape)
+    localY = (wholeY - deltaY * scale).reshape(shape)
+
+    ### Go to field coordinates
+    c = np.cos(w.robotAngle)
+    s = np.sin(w.robotAngle)
+    vel = w.robotVel
+    np.subtract(localX * c, localY * s, out=vel[..., 0])
+    np.add(localX * s, localY * c, out=vel[..., 1])
+
+    ### Robots can not move into walls, a robot can touch only one of two opposite walls
+    for axis in range(2):
+        coord = w.robotPos[..., axis]
+        atWall = np.abs(coord) + w.robotR > w.halfSize[axis]
+        if atWall.any():
+            component = vel[..., axis]
+            component *= ~atWall | (coord * component <= 0)
+    goalContacts(w, w.robotPos, vel, w.robotR, 1)
+
+    ### Robots push each other, see collisions.separate
+    if w.robotsCount > 1:
+        separateRobots(w)
+
+    ### Robots push the ball
+    dX = w.ballPos[..., None, 0] - w.robotPos[..., 0]
+    dY = w.ballPos[..., None, 1] - w.robotPos[..., 1]
+    touching = dX * dX + dY * dY <= (w.robotR + w.ballR) ** 2
+    if touching.any():
+        pushBall(w, touching.reshape(-1, w.robotsCount))
+
+    ### Apply velocity
+    w.robotPos += vel * dt
+
+    ### Apply acceleration, see Wheel.update
+    wheelVel = w.wheelVel
+    target = w.wheelTarget
+    accDt = w.wheelAcc * dt
+    gap = np.abs(wheelVel)
+    gap -= np.abs(target)
+    near = np.abs(gap, out=gap) <= accDt
+    step = np.subtract(target, wheelVel, out=gap)
+    wheelVel += np.copysign(accDt, step, out=step)
+    np.copyto(wheelVel, target, where=near)
+    np.minimum(wheelVel, w.maxVel, out=wheelVel)
+
+    ### Ball bounces from walls
+    ballVel = w.ballVel
+    for axis in range(2):
+        coord = w.ballPos[..., axis]
+        bounce = (np.abs(coord) + w.ballR > w.halfSize[axis]) & (coord * ballVel[..., axis] > 0)
+        if bounce.any():
+            ballVel[..., axis][bounce] *= -1
+            ballVel[bounce] *= w.bounceFactor
+    goalContacts(w, w.ballPos, ballVel, w.ballR, 2, w.bounceFactor)
+
+    ### Apply ball physics, see Ball.update
+    w.ballPos += ballVel * dt
+
+    velX = ballVel[..., 0]
+    velY = ballVel[..., 1]
+    speed = np.sqrt(velX * velX + velY * velY)
+    scale = np.maximum(speed - w.ballFriction * dt, 0) / np.maximum(speed, 1e-12)
+    velX *= scale
+    velY *= scale
+
+def separateRobots(w):
+    ### All pairs are checked in one pass. Touching ones are processed in the order of PhysEngine.contacts, with
+    ### positions changed by previous pairs; pairs without common robots do not affect each other and go together.
+    ### Robots have equal masses
+    pos = w.robotPos.reshape(-1, w.robotsCount, 2)
+    dX = pos[:, w.pairJ, 0] - pos[:, w.pairI, 0]
+    dY = pos[:, w.pairJ, 1] - pos[:, w.pairI, 1]
+    touching = dX * dX + dY * dY < (2 * w.robotR) ** 2
+    if not touching.any():
+        return
+
+    group = []
+    used = set()
+    for pair in np.flatnonzero(touching.any(axis=0)).tolist():
+        i, j = int(w.pairI[pair]), int(w.pairJ[pair])
+        if i in used or j in used:
+            separatePairs(w, touching, group)
+            group = []
+            used = set()
+        group.append(pair)
+        used.update((i, j))
+    separatePairs(w, touching, group)
+
+def separatePairs(w, touching, pairs):
+    ### Pairs have no common robots; touching (envs, pairs) mask is taken before separation and checked again here
+    reach = 2 * w.robotR
+    envs, columns = np.nonzero(touching[:, pairs])
+    first = envs * w.robotsCount + w.pairI[pairs][columns]
+    second = envs * w.robotsCount + w.pairJ[pairs][columns]
+
+    ### Rows of robots in all environments
+    pos = w.robotPos.reshape(-1, 2)
+    vel = w.robotVel.reshape(-1, 2)
+
+    delta = pos[second] - pos[first]
+    distance = np.sqrt(delta[:, 0] * delta[:, 0] + delta[:, 1] * delta[:, 1])
+    near = distance < reach
+
+    ### Robots at the same point go apart along x, as atan2(0, 0) is 0
+    apart = distance > 0
+    normal = np.where(apart[:, None], delta / np.where(apart, distance, 1)[:, None], (1, 0))
+
+    shift = normal * ((reach - distance) * near * 0.5)[:, None]
+    pos[first] -= shift
+    pos[second] += shift
+
+    relative = vel[first] - vel[second]
+    approach = relative[:, 0] * normal[:, 0] + relative[:, 1] * normal[:, 1]
+    push = normal * (np.maximum(approach, 0) * near * 0.5)[:, None]
+    vel[first] -= push
+    vel[second] += push
+
+def goalContacts(w, pos, vel, r, mirror, factor=1):
+    ### Objects touching goal walls lose (mirror=1) or mirror (mirror=2, times factor) velocity towards them,
+    ### see Field.touch. Only objects behind clearX are checked, all walls at once; walls are then processed one
+    ### after another with velocities changed by previous ones. Objects with center inside of a wall are not processed
+    pos = pos.reshape(-1, 2)
+    vel = vel.reshape(-1, 2)
+    behind = np.abs(pos[:, 0]) > w.clearX - r
+    if not behind.any():
+        return
+
+    near = np.flatnonzero(behind)
+    x, y = pos[near, 0, None], pos[near, 1, None]
+    dx = np.clip(x, w.goalBoxes[:, 0], w.goalBoxes[:, 2]) - x
+    dy = np.clip(y, w.goalBoxes[:, 1], w.goalBoxes[:, 3]) - y
+    distance2 = dx * dx + dy * dy
+    contact = (distance2 < r * r) & (distance2 > 0)
+    if not contact.any():
+        return
+
+    for box in np.flatnonzero(contact.any(axis=0)):
+        rows = np.flatnonzero(contact[:, box])
+        objects = near[rows]
+        boxX, boxY = dx[rows, box], dy[rows, box]
+        distance = np.sqrt(distance2[rows, box])
+
+        proj = (vel[objects, 0] * boxX + vel[objects, 1] * boxY) / distance
+        hit = proj > 0
+        if not hit.any():
+            continue
+
+        objects = objects[hit]
+        scale = mirror * proj[hit] / distance[hit]
+        vel[objects, 0] -= scale * boxX[hit]
+        vel[objects, 1] -= scale * boxY[hit]
+        if factor != 1:
+            vel[objects] *= factor
+
+def pushBall(w, touching):
+    ### Processes touches of robots with the ball only in environments where they happen, see PhysEngine.step
+    robotsPos = w.robotPos.reshape(-1, w.robotsCount, 2)
+    robotsVel = w.robotVel.reshape(-1, w.robotsCount, 2)
+    ballsPos = w.ballPos.reshape(-1, 2)
+    ballsVel = w.ballVel.reshape(-1, 2)
+
+    ### Robots are processed one after another as in PhysEngine.step
+    for i in np.flatnonzero(touching.any(axis=0)):
+        envs = np.flatnonzero(touching[:, i])
+
+        normal = ballsPos[envs] - robotsPos[envs, i]
+        normal /= np.sqrt((normal ** 2).sum(axis=-1, keepdims=True))
+
+        robotVel = robotsVel[envs, i]
+        lVel = ballsVel[envs] - robotVel
+        lProj = (lVel * normal).sum(axis=-1, keepdims=True)
+
+        ### Only if ball and robot are approaching
+        hit = lProj[:, 0] < 0
+        normal, robotVel, lVel, lProj = normal[hit], robotVel[hit], lVel[hit], lProj[hit]
+
+        mirrored = lVel - normal * (2 * lProj)
+        pushed = normal * (robotVel * normal).sum(axis=-1, keepdims=True)
+        ballsVel[envs[hit]] = mirrored * w.bounceFactor + pushed